@@ -0,0 +1,123 @@
+"""
+Compare ASR backends on CPU: real-time factor (processing time divided by
+audio duration, below 1.0 is faster than real time) and word error rate.
+
+    python benchmark_asr.py --audio samples/ --model-size base tiny --quantize
+
+--audio is a WAV/FLAC file or a directory of them. The reference text for
+clip.wav is read from clip.txt next to it; clips without one only get RTF.
+
+--pipeline also replays the audio through the full ears pipeline (speech
+gate, worker, inboxes) as fast as it can go and reports its throughput.
+"""
+import argparse
+import itertools
+import logging
+import sys
+import time
+from pathlib import Path
+from src.ears.asr import MODEL_SIZES, create_asr_backend, measure, word_error_rate
+from src.ears.audio_io import read_audio_file
+from src.ears.audio_source import AUDIO_EXTENSIONS, FileSource
+from src.ears.whisper_manager import WhisperManager
+
+
+def load_clips(path: Path):
+    files = sorted(p for p in path.iterdir() if p.suffix.lower() in AUDIO_EXTENSIONS) if path.is_dir() else [path]
+    clips = []
+    for file in files:
+        reference = file.with_suffix('.txt')
+        text = reference.read_text().strip() if reference.exists() else None
+        clips.append((file.name, read_audio_file(file), text))
+    return clips
+
+
+def run_pipeline(path: Path, backend):
+    """Replay the audio through WhisperManager; returns (transcripts, RTF).
+
+    RTF is None if the source delivered no audio, e.g. an unreadable file.
+    """
+    source = FileSource(str(path), speed=0)
+    manager = WhisperManager(backend=backend, source=source)
+    inbox = manager.open_inbox()
+    started = time.perf_counter()
+    manager.start_listening()
+    source.wait()
+    manager.wait_for_transcripts()
+    elapsed = time.perf_counter() - started
+    manager.stop_listening()
+    if not source.samples_delivered:
+        logging.error(f"No audio was delivered from {path}")
+        return manager.get_transcripts(inbox), None
+    return manager.get_transcripts(inbox), elapsed / (source.samples_delivered / source.sample_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ASR backends")
+    parser.add_argument('--audio', default='samples', help="Audio file or directory of clips")
+    parser.add_argument('--backend', nargs='+', default=['transformers'], choices=['transformers', 'faster-whisper'])
+    parser.add_argument('--model-size', nargs='+', default=['small'], choices=MODEL_SIZES)
+    parser.add_argument('--quantize', action='store_true', help="Also run transformers with int8 weights")
+    parser.add_argument('--beam-size', nargs='+', type=int, default=[1])
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed runs per configuration")
+    parser.add_argument('--pipeline', action='store_true', help="Also time the full ears pipeline")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    path = Path(args.audio)
+    if not path.exists():
+        print(f"No audio at {path}; pass --audio with a WAV file or a directory of clips")
+        sys.exit(1)
+    clips = load_clips(path)
+    if not clips:
+        print(f"No audio clips found in {path}")
+        sys.exit(1)
+    total_audio = sum(len(audio) for _, audio, _ in clips) / 16000
+    print(f"{len(clips)} clips, {total_audio:.1f}s of audio\n")
+
+    configurations = []
+    for backend, size, beam in itertools.product(args.backend, args.model_size, args.beam_size):
+        options = {'model_size': size, 'beam_size': beam, 'language': args.language}
+        configurations.append((backend, options))
+        if backend == 'transformers' and args.quantize:
+            configurations.append((backend, dict(options, quantize=True)))
+
+    print(f"{'backend':<16} {'model':<8} {'int8':<5} {'beam':<5} {'RTF':>7} {'WER':>7}"
+          + (f" {'pipe RTF':>9} {'pipe WER':>9}" if args.pipeline else ""))
+    for backend_name, options in configurations:
+        backend = create_asr_backend(backend_name, **options)
+        for _ in range(args.warmup):
+            backend.transcribe(clips[0][1])
+
+        elapsed = 0.0
+        errors = []
+        for name, audio, reference in clips:
+            text, seconds, _ = measure(backend, audio)
+            elapsed += seconds
+            if reference is not None:
+                errors.append((word_error_rate(reference, text), len(reference.split())))
+            logging.info(f"{name}: {text}")
+
+        # WER over all clips is weighted by reference length
+        words = sum(count for _, count in errors)
+        wer = sum(rate * count for rate, count in errors) / words if words else None
+        quantized = getattr(backend, 'quantize', True)  # faster-whisper runs int8
+        row = (f"{backend.name:<16} {options['model_size']:<8} {'yes' if quantized else 'no':<5} "
+               f"{options['beam_size']:<5} {elapsed / total_audio:>7.3f} "
+               f"{'-' if wer is None else f'{wer:.1%}':>7}")
+
+        if args.pipeline:
+            # The gate may split clips differently, so compare the whole text
+            transcripts, pipeline_rtf = run_pipeline(path, backend)
+            references = [reference for _, _, reference in clips]
+            pipeline_wer = None
+            if all(reference is not None for reference in references):
+                pipeline_wer = word_error_rate(" ".join(references), " ".join(transcripts))
+            row += (f" {'-' if pipeline_rtf is None else f'{pipeline_rtf:.3f}':>9}"
+                    f" {'-' if pipeline_wer is None else f'{pipeline_wer:.1%}':>9}")
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare speech backends: synthesis latency per phrase, real-time factor
+(synthesis time divided by audio length, for WAV output) and time to
+first audio when a reply is streamed sentence by sentence.
+
+    python benchmark_tts.py --backend openai espeak silent --voice espeak=en+f3
+
+The cache is bypassed so every run measures the engine itself.
+"""
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+import wave
+from pathlib import Path
+from src.voice.speech import split_sentences
+from src.voice.tts import create_tts_backend
+
+PHRASES = [
+    "Call connected.",
+    "Hello! How are you today?",
+    "I'm going to make some dinner, I'm starving.",
+    "The doorbell just rang, I think someone is at the front door.",
+    "I spent the afternoon writing in my journal about the garden and what I want to plant next spring.",
+]
+
+REPLY = ("Oh, hi! I was just about to make a sandwich. It's been a long day, honestly. "
+         "I spent most of it at the computer trying to fix a bug in my game. "
+         "Do you want to come over later and see it?")
+
+
+def wav_seconds(path: Path) -> float:
+    try:
+        with wave.open(str(path), 'rb') as f:
+            return f.getnframes() / f.getframerate()
+    except (wave.Error, EOFError):
+        return 0.0  # Not a WAV file
+
+
+def time_synthesis(backend, text: str, voice: str, directory: Path):
+    path = directory / f"bench.{backend.audio_format}"
+    started = time.perf_counter()
+    backend.synthesize(text, voice, path)
+    return time.perf_counter() - started, wav_seconds(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark speech backends")
+    parser.add_argument('--backend', nargs='+', default=['silent', 'local'],
+                        choices=['openai', 'espeak', 'pyttsx3', 'local', 'silent'])
+    parser.add_argument('--voice', nargs='*', default=[], help="Voice per backend as backend=voice")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    voices = dict(item.split('=', 1) for item in args.voice)
+
+    print(f"{'backend':<10} {'p50 ms':>8} {'p95 ms':>8} {'RTF':>7} {'whole reply ms':>15} {'first audio ms':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        for name in args.backend:
+            try:
+                backend = create_tts_backend(name)
+            except Exception as e:
+                print(f"{name:<10} unavailable: {e}")
+                continue
+            voice = voices.get(name, backend.default_voice)
+
+            latencies = []
+            audio_seconds = 0.0
+            for _ in range(args.repeat):
+                for phrase in PHRASES:
+                    elapsed, seconds = time_synthesis(backend, phrase, voice, directory)
+                    latencies.append(elapsed)
+                    audio_seconds += seconds
+
+            # Streaming plays the first sentence while the rest are generated
+            whole, _ = time_synthesis(backend, REPLY, voice, directory)
+            first, _ = time_synthesis(backend, split_sentences(REPLY)[0], voice, directory)
+
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            rtf = f"{sum(latencies) / audio_seconds:.3f}" if audio_seconds else "-"
+            print(f"{backend.name:<10} {statistics.median(latencies) * 1000:>8.1f} {p95 * 1000:>8.1f} "
+                  f"{rtf:>7} {whole * 1000:>15.1f} {first * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
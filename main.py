@@ -1,6 +1,8 @@
+import os
 import time
 from src.phone.voice_chat_server import run_server
 from src.server.world_server import WorldServer
+from src.server.async_world_server import AsyncWorldServer
 import threading
 import logging
 from src.environment.map import GameMap
@@ -31,7 +33,11 @@ if __name__ == "__main__":
         world_state = game_map.world_state
         
         # Initialize and start world server with game map
-        world_server = WorldServer(game_map)
+        # WORLD_SERVER_MODE=async serves every client from one event loop
+        if os.getenv('WORLD_SERVER_MODE', 'threaded').lower() == 'async':
+            world_server = AsyncWorldServer(game_map)
+        else:
+            world_server = WorldServer(game_map)
         world_server_thread = threading.Thread(target=run_world_server, args=(world_server,))
         world_server_thread.daemon = True
         world_server_thread.start()
@@ -54,7 +60,7 @@ if __name__ == "__main__":
                 break
             
             # Update world state time
-            world_state.update_time(1.0 / 3600.0)  # Update time by 1 second converted to hours
+            world_server.run_in_world(world_state.update_time, 1.0 / 3600.0)  # Update time by 1 second converted to hours
                 
     except KeyboardInterrupt:
         logger.info("\nShutting down servers gracefully...")
@@ -64,5 +70,8 @@ if __name__ == "__main__":
         # Cleanup
         if 'world_server' in locals():
             world_server.stop()
+        # Flush any pending world state changes
+        if 'world_state' in locals():
+            world_state.close()
         # Give threads a moment to clean up
         time.sleep(2)
\ No newline at end of file
@@ -24,7 +24,8 @@ import logging
 import threading
 
 class AutonomousCharacter:
-    def __init__(self, name: str, house: House, game_map: GameMap):
+    def __init__(self, name: str, house: House, game_map: GameMap,
+                 ears: Optional[WhisperManager] = None, voice_manager: Optional[VoiceManager] = None):
         self.name = name
         self.house = house
         self.game_map = game_map
@@ -47,8 +48,15 @@ class AutonomousCharacter:
         self.coding_system = CodingSystem(name)
         self.journal_system = JournalSystem(name)
         self.knowledge_system = KnowledgeSystem()
-        self.ears = WhisperManager()
-        self.voice_manager = VoiceManager()
+        # Hosts running several characters pass in shared instances
+        self.ears = ears or WhisperManager()
+        self.voice_manager = voice_manager or VoiceManager()
+        self.voice = None  # Speech backend voice; None uses the backend default
+        self.ear_inbox = self.ears.open_inbox()
+        # With streaming ears we also see what is being said right now
+        self.ear_partials = self.ears.open_inbox(partials=True) if self.ears.streaming else None
+        self.hearing_now = None
+        self.listen_enabled = True
         self.activity_manager = ActivityManager()
         self.current_activity_context = None
         
@@ -171,6 +179,7 @@ class AutonomousCharacter:
                 'current_room': current_room.value if current_room else 'unknown',
                 'available_objects': [obj.type.value for obj in available_objects if obj is not None],
                 'available_directions': self._get_available_directions(),
+                'destinations': [room.value for room in self.house.get_available_rooms()],
                 'recent_actions': self.action_history[-5:] if self.action_history else [],
                 **needs_info,
                 **memory_info,
@@ -185,11 +194,13 @@ class AutonomousCharacter:
                 }
             
             # Only check for environmental audio if we're not busy
-            if not self.is_busy:
+            if not self.is_busy and self.listen_enabled:
                 try:
                     environmental_audio = self.listen_to_environment()
                     if environmental_audio:  # Only add to context if we heard something
                         context['environmental_audio'] = environmental_audio
+                    if self.hearing_now:
+                        context['hearing_now'] = self.hearing_now
                 except Exception as e:
                     logging.warning(f"Failed to listen to environment: {e}")
             
@@ -217,12 +228,7 @@ class AutonomousCharacter:
             }
 
     def _get_available_directions(self) -> List[str]:
-        available = []
-        for direction in Direction:
-            new_pos = self.position.move(direction)
-            if self.house.is_valid_move(new_pos):
-                available.append(direction.value)
-        return available
+        return list(self.house.get_available_directions(self.position))
 
     def _execute_decision(self, decision: Dict) -> str:
         action = decision['action']
@@ -254,9 +260,21 @@ class AutonomousCharacter:
             except ValueError:
                 result = f"Invalid direction: {target}"
         
+        elif action == 'go_to':
+            if self.go_to(target):
+                room = self.house.get_room(self.position).value
+                result = f"Went to {target} in the {room}"
+                self.memory.add_memory(f"Went to {target}", importance=0.4)
+            else:
+                result = f"Cannot find a way to {target}"
+        
         elif action == 'use':
             try:
                 object_type = ObjectType(target)
+                # Walk over first instead of spending a decision on the trip
+                in_room = any(obj.type == object_type for obj in self.house.get_objects_in_room(self.position))
+                if not in_room:
+                    self.go_to(object_type.value)
                 if self.perform_action(object_type, action):
                     result = f"Using {object_type.value}"
                     self.memory.add_memory(
@@ -296,6 +314,16 @@ class AutonomousCharacter:
             return True
         return False
 
+    def go_to(self, target: str) -> bool:
+        """Walk the shortest path to a room or object in one step"""
+        path = self.house.find_path(self.position, target)
+        if path is None:
+            return False
+        for direction in path:
+            if not self.move(direction):
+                return False
+        return True
+
     def perform_action(self, object_type: ObjectType, action: str) -> bool:
         objects = self.house.get_objects_in_room(self.position)
         target_object = next((obj for obj in objects if obj.type == object_type), None)
@@ -457,14 +485,13 @@ class AutonomousCharacter:
         return None
 
     def listen_to_environment(self) -> Optional[str]:
-        """Listen to the environment and transcribe any speech"""
+        """Collect speech transcribed since the last call, without waiting"""
         try:
             if not self.ears.is_listening:
                 self.ears.start_listening()
             
-            transcription = self.ears.listen_and_transcribe()
-            
-            if transcription:
+            transcripts = self.ears.get_transcripts(self.ear_inbox)
+            for transcription in transcripts:
                 self.memory.add_memory(
                     f"Heard in environment: {transcription}",
                     importance=0.5,
@@ -476,36 +503,38 @@ class AutonomousCharacter:
                     f"Heard: {transcription}",
                     emotions={"attentive": 0.6}
                 )
-                
-                return transcription
+
+            if self.ear_partials is not None:
+                # Only the newest hypothesis matters; a final one means they stopped
+                for partial in self.ears.get_transcripts(self.ear_partials):
+                    self.hearing_now = None if partial.final else partial.text
             
-            return None
+            return " ".join(transcripts) if transcripts else None
 
         except Exception as e:
+            # The ears may be shared with other characters, so leave them running
             logging.warning(f"Error listening to environment: {e}")
-            if self.ears.is_listening:
-                self.ears.stop_listening()
             return None
 
-    def speak(self, text: str) -> Optional[Path]:
+    def speak(self, text: str) -> List[Path]:
         """Speak through system speakers"""
         self.voice_manager.set_output_mode("speakers")
-        audio_file = self.voice_manager.speak(text)
+        audio_files = self.voice_manager.speak(text, self.voice)
         
-        if audio_file:
+        if audio_files:
             self.memory.add_memory(
                 f"Spoke: {text}",
                 importance=0.4,
                 emotions={'expressive': 0.6}
             )
-        return audio_file
+        return audio_files
         
     def speak_in_voice_chat(self, text: str) -> bool:
         """Speak through virtual microphone for voice chat"""
         self.voice_manager.set_output_mode("virtual_mic")
-        audio_file = self.voice_manager.speak(text)
+        audio_files = self.voice_manager.speak(text, self.voice)
         
-        if audio_file:
+        if audio_files:
             self.memory.add_memory(
                 f"Spoke in voice chat: {text}",
                 importance=0.5,
@@ -522,14 +551,34 @@ class AutonomousCharacter:
                 'x': self.position.x,
                 'y': self.position.y
             },
+            'home_position': {
+                'x': self.house.position.x,
+                'y': self.house.position.y
+            },
             'current_room': self.current_room.value if self.current_room else None,
             'needs': self.needs,
             'thought': self.thought,
-            'online': True,
+            'online': self.online,
             'last_update': time.time(),
-            'status': 'active'
+            'status': 'active' if self.online else 'offline'
         }
 
+    def restore(self, state: dict):
+        """Restore state produced by serialize(), e.g. after moving hosts"""
+        if 'position' in state:
+            x, y = state['position']['x'], state['position']['y']
+            if state.get('home_position'):
+                # Keep the same spot relative to the house, wherever it is now
+                x += self.house.position.x - state['home_position']['x']
+                y += self.house.position.y - state['home_position']['y']
+            self.position = Position(x, y)
+        if state.get('current_room'):
+            self.current_room = RoomType(state['current_room'])
+        for need, value in state.get('needs', {}).items():
+            if need in self.needs_system.values:
+                self.needs_system.values[need] = value
+        self.thought = state.get('thought', self.thought)
+
     def _get_need_status(self, value: float) -> str:
         """Convert need value to status string"""
         if value >= 90:
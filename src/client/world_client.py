@@ -1,91 +1,338 @@
 import socket
 import json
 import logging
-from typing import Optional
+from concurrent.futures import Future
+from typing import List, Optional
+import collections
+import queue
+import random
+import threading
 import time
+from src.utils.protocol import (
+    CODEC_JSON, PROTOCOL_VERSION, SUPPORTED_VERSIONS, FrameDecoder,
+    available_codecs, codec_from_name, encode_frame
+)
 
 class WorldClient:
-    def __init__(self, host: str, port: int):
+    """Persistent connection to the world server.
+
+    A background thread owns the socket: it reconnects with jittered
+    exponential backoff and writes queued requests, while a reader thread
+    matches responses to requests by id. Character updates are
+    fire-and-forget; only the latest unsent state per character is kept,
+    and acks arrive asynchronously.
+    """
+
+    def __init__(self, host: str, port: int, request_timeout: float = 10.0,
+                 connect_timeout: float = 7.0, reconnect_delay: float = 0.5,
+                 max_reconnect_delay: float = 30.0):
         self.host = host
         self.port = port
         self.socket = None
         self.logger = logging.getLogger("WorldClient")
+        self.codec = CODEC_JSON
+        self.protocol_version = PROTOCOL_VERSION
+        self.request_timeout = request_timeout
+        self.max_batch_size = 1000
+        self.connect_timeout = connect_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        
+        self.running = False
+        self._next_id = 0
+        self._send_queue = queue.Queue()
+        self._pending_updates = {}  # Latest unsent state per character
+        self._updates_lock = threading.Lock()
+        self._in_flight = {}  # Request id -> (future, sent_at, character updates)
+        self._in_flight_lock = threading.Lock()
+        self._conn_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._connected = threading.Event()
+        self._io_thread = None
+        
+        # Metrics
+        self.latencies = collections.deque(maxlen=1000)
+        self.reconnect_count = 0
+        self.coalesced_updates = 0
+        self.acked_updates = 0
+        self.failed_updates = 0
         
     def connect(self) -> bool:
-        max_retries = 3
-        retry_delay = 1  # seconds
+        """Start the I/O thread and wait for the first connection"""
+        if not self.running:
+            self.running = True
+            self._stop.clear()
+            self._io_thread = threading.Thread(target=self._io_loop, name="WorldClientIO")
+            self._io_thread.daemon = True
+            self._io_thread.start()
         
-        for attempt in range(max_retries):
-            try:
-                self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.socket.connect((self.host, self.port))
-                self.logger.info(f"Successfully connected to world server on attempt {attempt + 1}")
-                return True
-            except Exception as e:
-                self.logger.warning(f"Connection attempt {attempt + 1} failed: {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                self.socket = None
+        if self._connected.wait(self.connect_timeout):
+            return True
         
-        self.logger.error("Failed to connect after all retries")
+        self.logger.error("Failed to connect to world server")
+        self._shutdown()
         return False
             
-    def disconnect(self):
-        if self.socket:
-            self.socket.close()
+    def disconnect(self, timeout: float = 2.0):
+        """Flush pending updates, then close the connection"""
+        if self.running:
+            self.flush_updates(timeout)
+        self._shutdown()
+
+    def _shutdown(self):
+        self.running = False
+        self._stop.set()
+        self._wake.set()
+        if self._io_thread and self._io_thread is not threading.current_thread():
+            self._io_thread.join(timeout=5.0)
+        self._io_thread = None
+        with self._conn_lock:
+            sock = self.socket
+        if sock:
+            self._drop_connection(sock, ConnectionError("Client disconnected"))
             
     def send_message(self, message: dict) -> Optional[dict]:
-        if not self.socket:
+        return self.send_messages([message])[0]
+
+    def send_messages(self, messages: List[dict]) -> List[Optional[dict]]:
+        """Pipeline several requests and return their responses in order"""
+        if not self.running:
             self.logger.error("Not connected to server")
-            return None
+            return [None] * len(messages)
         
-        try:
-            # Send the message
-            message_json = json.dumps(message)
-            self.socket.send(message_json.encode())
+        futures = [self.request(message) for message in messages]
+        results = []
+        for future in futures:
+            try:
+                response = future.result(timeout=self.request_timeout)
+            except Exception as e:
+                self.logger.error(f"Error sending message: {str(e)}")
+                results.append(None)
+                continue
+            if response.get('status') == 'error':
+                self.logger.error(f"Server error: {response.get('message')}")
+                results.append(None)
+            else:
+                results.append(response)
+        return results
+
+    def request(self, message: dict) -> Future:
+        """Queue a request; the future resolves with the server's response"""
+        future = Future()
+        self._send_queue.put((message, future))
+        self._wake.set()
+        return future
+
+    def flush_updates(self, timeout: float = 2.0) -> bool:
+        """Wait until every queued character update and request has been acked"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._updates_lock, self._in_flight_lock:
+                pending = bool(self._pending_updates) or bool(self._in_flight) or not self._send_queue.empty()
+            if not pending:
+                return True
+            self._wake.set()
+            time.sleep(0.01)
+        return False
+
+    def get_metrics(self) -> dict:
+        """Get request latency and connection metrics"""
+        latencies = sorted(self.latencies)
+        
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+        
+        return {
+            'connected': self._connected.is_set(),
+            'requests': len(latencies),
+            'avg_latency_ms': (sum(latencies) / len(latencies) * 1000) if latencies else 0.0,
+            'p50_latency_ms': percentile(0.5),
+            'p95_latency_ms': percentile(0.95),
+            'max_latency_ms': latencies[-1] * 1000 if latencies else 0.0,
+            'in_flight': len(self._in_flight),
+            'pending_updates': len(self._pending_updates),
+            'coalesced_updates': self.coalesced_updates,
+            'acked_updates': self.acked_updates,
+            'failed_updates': self.failed_updates,
+            'reconnects': self.reconnect_count
+        }
+
+    def _io_loop(self):
+        """Own the connection: (re)connect, then write whatever is queued"""
+        delay = self.reconnect_delay
+        first_attempt = True
+        while self.running:
+            if not self._connected.is_set():
+                if not self._open_connection():
+                    # Jitter keeps many clients from reconnecting in lockstep
+                    self._stop.wait(random.uniform(0.5, 1.0) * delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+                    continue
+                if not first_attempt:
+                    self.reconnect_count += 1
+                first_attempt = False
+                delay = self.reconnect_delay
             
-            # Read the response in chunks
-            chunks = []
+            self._wake.wait(0.5)
+            self._wake.clear()
+            sock = self.socket
+            if sock is None or not self._connected.is_set():
+                # Dropped while we waited; reconnect before writing anything
+                continue
+            try:
+                self._flush_outgoing(sock)
+            except Exception as e:
+                self._drop_connection(sock, e)
+
+    def _open_connection(self) -> bool:
+        """Connect, negotiate the protocol and start the reader"""
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+            decoder = FrameDecoder()
+            self._negotiate(sock, decoder)
+            sock.settimeout(None)
+        except Exception as e:
+            self.logger.warning(f"Connection attempt failed: {str(e)}")
+            return False
+        
+        with self._conn_lock:
+            self.socket = sock
+        reader = threading.Thread(target=self._read_loop, args=(sock, decoder), name="WorldClientReader")
+        reader.daemon = True
+        reader.start()
+        self._connected.set()
+        self.logger.info("Connected to world server")
+        return True
+
+    def _negotiate(self, sock, decoder: FrameDecoder):
+        """Agree on protocol version and body codec with the server"""
+        sock.sendall(encode_frame({
+            'command': 'hello',
+            'versions': SUPPORTED_VERSIONS,
+            'codecs': available_codecs()
+        }))
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                raise ConnectionError("Connection closed during negotiation")
+            for _, response in decoder.feed(data):
+                if response.get('status') != 'success':
+                    raise ConnectionError(f"Protocol negotiation failed: {response.get('message')}")
+                self.protocol_version = response.get('version', PROTOCOL_VERSION)
+                self.codec = codec_from_name(response.get('codec', 'json'))
+                return
+
+    def _flush_outgoing(self, sock):
+        """Write queued requests and the latest character updates in one batch"""
+        frames = []
+        request_ids = []
+        now = time.perf_counter()
+        with self._in_flight_lock:
             while True:
-                chunk = self.socket.recv(8192)  # Increased buffer size
-                if not chunk:
-                    break
-                chunks.append(chunk)
-                if chunk.endswith(b'}'):  # Check for end of JSON
+                try:
+                    message, future = self._send_queue.get_nowait()
+                except queue.Empty:
                     break
-                
-            if not chunks:
-                raise ConnectionError("No response received from server")
+                self._next_id += 1
+                request_ids.append(self._next_id)
+                self._in_flight[self._next_id] = (future, now, None)
+                frames.append(encode_frame(dict(message, id=self._next_id), self.codec))
             
-            # Combine chunks and parse JSON
-            response_data = b''.join(chunks)
+            with self._updates_lock:
+                updates = list(self._pending_updates.items())
+                self._pending_updates = {}
+            # All pending character updates travel in one batch frame
+            for start in range(0, len(updates), self.max_batch_size):
+                chunk = updates[start:start + self.max_batch_size]
+                self._next_id += 1
+                request_ids.append(self._next_id)
+                self._in_flight[self._next_id] = (None, now, chunk)
+                frames.append(encode_frame({
+                    'command': 'batch',
+                    'operations': [
+                        {'command': 'update_character', 'character': character_data}
+                        for _, character_data in chunk
+                    ],
+                    'id': self._next_id
+                }, self.codec))
+        
+        if frames:
             try:
-                response = json.loads(response_data.decode())
-                if response.get('status') == 'error':
-                    self.logger.error(f"Server error: {response.get('message')}")
-                    return None
-                return response
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Invalid JSON in response: {e}")
-                self.logger.debug(f"Raw response: {response_data.decode()[:200]}...")  # Log first 200 chars
-                return None
-            
+                sock.sendall(b''.join(frames))
+            except Exception as e:
+                # The socket may already have been dropped by the reader, in
+                # which case nobody else will fail or requeue these
+                self._fail_in_flight(e, request_ids)
+                raise
+
+    def _read_loop(self, sock, decoder: FrameDecoder):
+        try:
+            while self.running:
+                data = sock.recv(65536)
+                if not data:
+                    raise ConnectionError("Connection closed by server")
+                for _, response in decoder.feed(data):
+                    self._resolve(response)
         except Exception as e:
-            self.logger.error(f"Error sending message: {str(e)}")
-            # Try to reconnect
-            if self.connect():
-                try:
-                    # Retry the message once if reconnection successful
-                    message_json = json.dumps(message)
-                    self.socket.send(message_json.encode())
-                    response_data = self.socket.recv(8192)
-                    if not response_data:
-                        raise ConnectionError("No response received from server after reconnect")
-                    return json.loads(response_data.decode())
-                except Exception as e:
-                    self.logger.error(f"Error sending message after reconnect: {str(e)}")
-            return None
+            self._drop_connection(sock, e)
+
+    def _resolve(self, response: dict):
+        request_id = response.pop('id', None)
+        with self._in_flight_lock:
+            entry = self._in_flight.pop(request_id, None)
+        if entry is None:
+            return
+        future, sent_at, updates = entry
+        self.latencies.append(time.perf_counter() - sent_at)
+        if future is not None:
+            future.set_result(response)
+            return
+        
+        results = response.get('results') or [response] * len(updates)
+        for (name, _), result in zip(updates, results):
+            if result.get('status') == 'success':
+                self.acked_updates += 1
+            else:
+                self.failed_updates += 1
+                self.logger.warning(f"Update for {name} rejected: {result.get('message')}")
+
+    def _drop_connection(self, sock, error: Exception):
+        """Close a broken connection and fail or requeue what was in flight"""
+        with self._conn_lock:
+            if sock is None or sock is not self.socket:
+                return
+            self.socket = None
+            self._connected.clear()
+        try:
+            sock.close()
+        except Exception:
+            pass
+        
+        if self.running:
+            self.logger.warning(f"Lost connection to world server: {str(error)}")
+        self._fail_in_flight(error)
+
+    def _fail_in_flight(self, error: Exception, request_ids: Optional[List[int]] = None):
+        """Fail waiting requests and requeue unacked updates; all of them by default"""
+        with self._in_flight_lock:
+            if request_ids is None:
+                in_flight = self._in_flight
+                self._in_flight = {}
+            else:
+                in_flight = {
+                    request_id: self._in_flight.pop(request_id)
+                    for request_id in request_ids if request_id in self._in_flight
+                }
+        for future, _, updates in in_flight.values():
+            if future is not None:
+                future.set_exception(ConnectionError(str(error)))
+                continue
+            # Resend unacked updates unless a newer state is queued
+            with self._updates_lock:
+                for name, character_data in updates:
+                    self._pending_updates.setdefault(name, character_data)
+        self._wake.set()
             
     def get_world_state(self):
         response = self.send_message({'command': 'get_world_state'})
@@ -111,9 +358,162 @@ class WorldClient:
             self.logger.error(f"Error registering character: {str(e)}")
             return False
         
-    def update_character_state(self, character):
+    def send_batch(self, operations: List[dict], flush: bool = False) -> Optional[List[dict]]:
+        """Apply many register/update operations in one round trip.
+        
+        Returns the per-operation results, or None if the batch failed.
+        """
         response = self.send_message({
-            'command': 'update_character',
-            'character': character.serialize()
+            'command': 'batch',
+            'operations': operations,
+            'flush': flush
         })
-        return response and response.get('status') == 'success' 
\ No newline at end of file
+        return response.get('results') if response else None
+
+    def register_characters(self, characters) -> List[bool]:
+        """Register several characters in one round trip"""
+        results = self.send_batch([
+            {'command': 'register_character', 'character': character.serialize()}
+            for character in characters
+        ])
+        if results is None:
+            return [False] * len(characters)
+        return [result.get('status') == 'success' for result in results]
+
+    def update_character_state(self, character) -> bool:
+        """Queue the character's state; only the latest unsent state is sent"""
+        if not self.running:
+            return False
+        character_data = character.serialize()
+        with self._updates_lock:
+            if character.name in self._pending_updates:
+                self.coalesced_updates += 1
+            self._pending_updates[character.name] = character_data
+        self._wake.set()
+        return True
+
+    def unregister_character(self, name: str) -> Future:
+        """Queue taking a character offline without waiting for the reply.
+
+        Any unsent update for the character is dropped so it can't mark
+        the character online again.
+        """
+        with self._updates_lock:
+            self._pending_updates.pop(name, None)
+        return self.request({
+            'command': 'unregister_character',
+            'character': {'name': name}
+        })
+
+
+class WorldSubscriber:
+    """Keeps a local mirror of the world state from server pushes.
+
+    Uses its own framed connection: after subscribing, the server sends a keyframe
+    followed by sequence-numbered deltas. A gap in the sequence triggers a
+    resync, and deltas are ignored until the next keyframe arrives.
+    """
+
+    def __init__(self, host: str, port: int, on_update=None):
+        self.host = host
+        self.port = port
+        self.on_update = on_update
+        self.socket = None
+        self.logger = logging.getLogger("WorldSubscriber")
+        self.world_state = None
+        self.seq = None
+        self.running = False
+        self.resync_pending = False
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self) -> bool:
+        """Connect and subscribe to world updates"""
+        try:
+            self.socket = socket.create_connection((self.host, self.port))
+            self.socket.sendall(encode_frame({'command': 'subscribe'}))
+        except Exception as e:
+            self.logger.error(f"Failed to subscribe to world server: {str(e)}")
+            self.socket = None
+            return False
+
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="WorldSubscriber")
+        self._thread.daemon = True
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        if self.socket:
+            try:
+                self.socket.close()
+            except Exception:
+                pass
+            self.socket = None
+
+    def get_world_state(self) -> Optional[dict]:
+        """Get a copy of the mirrored world state"""
+        with self._lock:
+            if self.world_state is None:
+                return None
+            return json.loads(json.dumps(self.world_state))
+
+    def _run(self):
+        decoder = FrameDecoder()
+        try:
+            while self.running:
+                chunk = self.socket.recv(65536)
+                if not chunk:
+                    break
+                for _, message in decoder.feed(chunk):
+                    self._handle_message(message)
+        except Exception as e:
+            if self.running:
+                self.logger.error(f"World subscription error: {str(e)}")
+        finally:
+            self.running = False
+
+    def _handle_message(self, message: dict):
+        message_type = message.get('type')
+        if message_type == 'keyframe':
+            with self._lock:
+                self.world_state = message['world_state']
+                self.seq = message['seq']
+                self.resync_pending = False
+        elif message_type == 'delta':
+            with self._lock:
+                if self.seq is None or message['seq'] != self.seq + 1:
+                    # Missed a delta; wait for a keyframe
+                    if not self.resync_pending:
+                        self.logger.warning(f"Sequence gap (have {self.seq}, got {message['seq']}), resyncing")
+                        self.resync_pending = True
+                        self.socket.sendall(encode_frame({'command': 'resync'}))
+                    return
+                self._apply_delta(message['changes'])
+                self.seq = message['seq']
+        else:
+            if message.get('status') == 'error':
+                self.logger.error(f"Server error: {message.get('message')}")
+            return
+
+        if self.on_update:
+            self.on_update(message)
+
+    def _apply_delta(self, changes: dict):
+        plots = {
+            (plot['position']['x'], plot['position']['y']): plot
+            for plot in self.world_state.get('plots', [])
+        }
+        for plot in changes.get('plots', []):
+            plots[(plot['position']['x'], plot['position']['y'])] = plot
+        self.world_state['plots'] = list(plots.values())
+
+        self.world_state.setdefault('characters', {}).update(changes.get('characters', {}))
+
+        world_changes = changes.get('world_state', {})
+        world = self.world_state.setdefault('world_state', {})
+        for section in ('time', 'weather'):
+            if section in world_changes:
+                world[section] = world_changes[section]
+        world.setdefault('characters', {}).update(world_changes.get('characters', {}))
@@ -419,12 +419,10 @@ class BrowserController:
             return False
             
         try:
-            # Generate speech audio
-            audio_file = self.voice.complete_task(text)
+            # Play each sentence through the virtual mic as soon as it's generated
+            audio_files = self.voice.speak(text, self.virtual_mic.play_audio)
             
-            if audio_file:
-                # Play audio through virtual mic
-                self.virtual_mic.play_audio(audio_file)
+            if audio_files:
                 print(f"Speaking through virtual mic: {text}")
                 return True
             else:
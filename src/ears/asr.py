@@ -0,0 +1,166 @@
+from abc import ABC, abstractmethod
+import logging
+import threading
+import time
+from typing import Optional
+import numpy as np
+
+try:
+    import torch
+    from transformers import WhisperProcessor, WhisperForConditionalGeneration
+    from transformers import logging as transformers_logging
+    transformers_logging.set_verbosity_error()
+except ImportError:
+    torch = None
+    WhisperProcessor = WhisperForConditionalGeneration = None
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+MODEL_SIZES = ('tiny', 'base', 'small', 'medium')
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_whisper(model_name="openai/whisper-small", quantize=False):
+    """Load a Whisper processor and model once per process and share them"""
+    with _models_lock:
+        key = (model_name, quantize)
+        if key not in _models:
+            if WhisperProcessor is None:
+                raise ImportError("transformers is not installed")
+            processor = WhisperProcessor.from_pretrained(model_name)
+            model = WhisperForConditionalGeneration.from_pretrained(model_name)
+            model.eval()
+            if quantize:
+                # Linear layers dominate CPU time; int8 weights roughly halve it
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            _models[key] = (processor, model)
+            logging.info(f"Whisper model {model_name} loaded successfully")
+        return _models[key]
+
+
+class ASRBackend(ABC):
+    """Turns a float32 16 kHz utterance into text"""
+
+    name = 'base'
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray, sample_rate: int = 16000) -> str:
+        pass
+
+
+class TransformersWhisperBackend(ASRBackend):
+    """Whisper through transformers, optionally with int8 dynamic quantization"""
+
+    name = 'transformers'
+
+    def __init__(self, model_size: str = 'small', model_name: Optional[str] = None,
+                 quantize: bool = False, beam_size: int = 1, language: Optional[str] = None):
+        self.model_name = model_name or f"openai/whisper-{model_size}"
+        self.quantize = quantize
+        self.beam_size = beam_size
+        self.language = language
+        self.processor, self.model = load_whisper(self.model_name, quantize)
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int = 16000) -> str:
+        input_features = self.processor(
+            audio,
+            sampling_rate=sample_rate,
+            return_tensors="pt"
+        ).input_features
+
+        kwargs = {'num_beams': self.beam_size}
+        if self.language:
+            kwargs['language'] = self.language
+        with torch.inference_mode():
+            predicted_ids = self.model.generate(input_features, **kwargs)
+        return self.processor.batch_decode(predicted_ids, skip_special_tokens=True)[0].strip()
+
+
+class FasterWhisperBackend(ASRBackend):
+    """CTranslate2 Whisper from faster-whisper, int8 on CPU by default"""
+
+    name = 'faster-whisper'
+
+    def __init__(self, model_size: str = 'small', compute_type: str = 'int8',
+                 beam_size: int = 1, language: Optional[str] = None, cpu_threads: int = 0):
+        if WhisperModel is None:
+            raise ImportError("faster-whisper is not installed")
+        self.model = WhisperModel(model_size, device='cpu', compute_type=compute_type, cpu_threads=cpu_threads)
+        self.beam_size = beam_size
+        self.language = language
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int = 16000) -> str:
+        segments, _ = self.model.transcribe(
+            audio,
+            beam_size=self.beam_size,
+            language=self.language,
+            vad_filter=False  # The speech gate already did this
+        )
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+def create_asr_backend(name: str = 'transformers', **kwargs) -> ASRBackend:
+    """Build a backend by name: 'transformers' or 'faster-whisper'"""
+    if name == 'faster-whisper':
+        try:
+            return FasterWhisperBackend(**kwargs)
+        except ImportError:
+            logging.warning("faster-whisper is not installed, using transformers with int8 quantization")
+            kwargs.pop('compute_type', None)
+            kwargs.pop('cpu_threads', None)
+            return TransformersWhisperBackend(quantize=True, **kwargs)
+    if name == 'transformers':
+        return TransformersWhisperBackend(**kwargs)
+    raise ValueError(f"Unknown ASR backend: {name}")
+
+
+def preload_asr_backend(backend: str = 'transformers', model_size: str = 'small',
+                        model_name: Optional[str] = None, quantize: bool = False, **_):
+    """Load the weights create_asr_backend would use for these options.
+
+    Takes the same options as WhisperManager and ignores the ones that
+    aren't about the model. Only transformers weights are cached per
+    process; faster-whisper models are loaded by each process that uses them.
+    """
+    if backend == 'faster-whisper':
+        if WhisperModel is not None:
+            return
+        quantize = True  # create_asr_backend's fallback
+    load_whisper(model_name or f"openai/whisper-{model_size}", quantize)
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level edit distance divided by the reference length"""
+    ref = _normalize(reference)
+    hyp = _normalize(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def _normalize(text: str):
+    cleaned = ''.join(c.lower() if c.isalnum() or c.isspace() or c == "'" else ' ' for c in text)
+    return cleaned.split()
+
+
+def measure(backend: ASRBackend, audio: np.ndarray, sample_rate: int = 16000):
+    """Transcribe once and return (text, seconds taken, real-time factor)"""
+    started = time.perf_counter()
+    text = backend.transcribe(audio, sample_rate)
+    elapsed = time.perf_counter() - started
+    return text, elapsed, elapsed / (len(audio) / sample_rate)
@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Preallocated float32 ring buffer for captured audio.
+
+    Samples are copied straight from the capture block into the buffer,
+    which doubles in size as needed up to max_samples. Readers get views
+    into the storage instead of copies.
+    """
+
+    def __init__(self, initial_samples: int = 32000, max_samples: int = 480000):
+        self.max_samples = max_samples
+        self._data = np.empty(min(initial_samples, max_samples), dtype=np.float32)
+        self._start = 0  # Index of the oldest sample
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    @property
+    def is_full(self) -> bool:
+        return self._size >= self.max_samples
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def _grow(self, needed: int):
+        capacity = len(self._data)
+        while capacity < needed and capacity < self.max_samples:
+            capacity = min(capacity * 2, self.max_samples)
+        if capacity == len(self._data):
+            return
+        data = np.empty(capacity, dtype=np.float32)
+        first, second = self.views()
+        data[:len(first)] = first
+        data[len(first):self._size] = second
+        self._data = data
+        self._start = 0
+
+    def write(self, samples: np.ndarray, overwrite: bool = False) -> int:
+        """Append samples; returns how many were stored.
+        
+        Once max_samples is reached extra samples are refused, or with
+        overwrite=True they replace the oldest ones.
+        """
+        if self._size + len(samples) > len(self._data):
+            self._grow(self._size + len(samples))
+        capacity = len(self._data)
+        if overwrite:
+            if len(samples) > capacity:
+                samples = samples[-capacity:]
+            self.consume(max(0, self._size + len(samples) - capacity))
+        count = min(len(samples), capacity - self._size)
+        if count <= 0:
+            return 0
+
+        end = (self._start + self._size) % capacity
+        first = min(count, capacity - end)
+        self._data[end:end + first] = samples[:first]
+        if count > first:
+            self._data[:count - first] = samples[first:count]
+        self._size += count
+        return count
+
+    def consume(self, count: int):
+        """Drop the oldest count samples"""
+        count = min(count, self._size)
+        self._size -= count
+        self._start = (self._start + count) % len(self._data) if self._size else 0
+
+    def views(self):
+        """The contents as two views into the storage, oldest first"""
+        capacity = len(self._data)
+        end = self._start + self._size
+        if end <= capacity:
+            return self._data[self._start:end], self._data[:0]
+        return self._data[self._start:], self._data[:end - capacity]
+
+    def take(self) -> np.ndarray:
+        """Remove and return the contents as one contiguous array.
+
+        When the contents don't wrap the storage is handed over as is and
+        the buffer starts again on fresh storage, so nothing is copied.
+        """
+        first, second = self.views()
+        if len(second):
+            result = np.concatenate((first, second))
+        else:
+            result = first
+            self._data = np.empty(len(self._data), dtype=np.float32)
+        self.clear()
+        return result
+
+
+def rms(samples: np.ndarray) -> float:
+    """Root mean square of a block without temporary arrays"""
+    if len(samples) == 0:
+        return 0.0
+    return float(np.sqrt(np.dot(samples, samples) / len(samples)))
@@ -0,0 +1,56 @@
+import wave
+import numpy as np
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Linear resampling, good enough for speech going into Whisper"""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    duration = len(samples) / source_rate
+    target_times = np.arange(int(duration * target_rate)) / target_rate
+    source_times = np.arange(len(samples)) / source_rate
+    return np.interp(target_times, source_times, samples).astype(np.float32)
+
+
+def read_audio_file(path: str, sample_rate: int = 16000) -> np.ndarray:
+    """Read a WAV (or, with soundfile installed, FLAC/OGG) file as mono float32"""
+    path = str(path)
+    if soundfile is not None:
+        samples, file_rate = soundfile.read(path, dtype='float32', always_2d=True)
+        samples = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+        return resample(np.ascontiguousarray(samples, dtype=np.float32), file_rate, sample_rate)
+
+    if not path.lower().endswith('.wav'):
+        raise ImportError("soundfile is needed to read non-WAV audio")
+    with wave.open(path, 'rb') as f:
+        file_rate = f.getframerate()
+        channels = f.getnchannels()
+        width = f.getsampwidth()
+        frames = f.readframes(f.getnframes())
+
+    if width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    elif width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width} bytes")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return resample(samples, file_rate, sample_rate)
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int = 16000):
+    """Write mono float32 samples as 16-bit PCM WAV"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
@@ -0,0 +1,234 @@
+from abc import ABC, abstractmethod
+import logging
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+import numpy as np
+from src.ears.audio_io import read_audio_file
+
+try:
+    import sounddevice as sd
+except (ImportError, OSError):  # OSError when PortAudio is missing
+    sd = None
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg')
+
+# Same signature as a sounddevice callback: (indata, frames, time_info, status)
+# with indata a (frames, channels) float32 array
+AudioCallback = Callable[[np.ndarray, int, object, object], None]
+
+
+class AudioSource(ABC):
+    """Delivers blocks of mono float32 audio to a callback"""
+
+    def __init__(self, sample_rate: int = 16000, block_size: int = 1600):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.is_active = False
+
+    @abstractmethod
+    def start(self, callback: AudioCallback):
+        pass
+
+    @abstractmethod
+    def stop(self):
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """The default input device through sounddevice"""
+
+    def __init__(self, sample_rate: int = 16000, block_size: int = 1600, channels: int = 1):
+        super().__init__(sample_rate, block_size)
+        self.channels = channels
+        self.stream = None
+
+    def start(self, callback: AudioCallback):
+        if sd is None:
+            raise RuntimeError("sounddevice is not available; use a file or socket audio source")
+        self.stream = sd.InputStream(
+            callback=callback,
+            channels=self.channels,
+            samplerate=self.sample_rate,
+            blocksize=self.block_size
+        )
+        self.stream.start()
+        self.is_active = True
+
+    def stop(self):
+        try:
+            if self.stream:
+                self.stream.stop()
+                self.stream.close()
+        finally:
+            self.stream = None
+            self.is_active = False
+
+
+class _ThreadedSource(AudioSource):
+    """A source that pushes blocks from its own thread"""
+
+    def __init__(self, sample_rate: int = 16000, block_size: int = 1600):
+        super().__init__(sample_rate, block_size)
+        self._thread = None
+        self._stop = threading.Event()
+        self.finished = threading.Event()
+
+    def start(self, callback: AudioCallback):
+        self._stop.clear()
+        self.finished.clear()
+        self.is_active = True
+        self._thread = threading.Thread(target=self._run_safely, args=(callback,),
+                                        name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5.0)
+        self._thread = None
+        self.is_active = False
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the source has run out of audio"""
+        return self.finished.wait(timeout)
+
+    def _run_safely(self, callback: AudioCallback):
+        try:
+            self._run(callback)
+        except Exception as e:
+            logging.error(f"Audio source {type(self).__name__} failed: {e}")
+        finally:
+            self.finished.set()
+
+    @abstractmethod
+    def _run(self, callback: AudioCallback):
+        pass
+
+    def _deliver(self, callback: AudioCallback, samples: np.ndarray):
+        callback(samples.reshape(-1, 1), len(samples), None, None)
+
+
+class FileSource(_ThreadedSource):
+    """Replays a WAV/FLAC file, or every one in a directory, as if captured live.
+
+    speed 1.0 is real time, 4.0 four times faster and 0 as fast as the
+    pipeline takes it. tail_silence seconds of silence follow each file
+    so the speech gate finishes its last utterance.
+    """
+
+    def __init__(self, path: str, sample_rate: int = 16000, block_size: int = 1600,
+                 speed: float = 1.0, loop: bool = False, tail_silence: float = 1.5):
+        super().__init__(sample_rate, block_size)
+        self.path = Path(path)
+        self.speed = speed
+        self.loop = loop
+        self.tail_silence = tail_silence
+        self.samples_delivered = 0
+
+    def files(self) -> List[Path]:
+        if self.path.is_dir():
+            return sorted(p for p in self.path.iterdir() if p.suffix.lower() in AUDIO_EXTENSIONS)
+        return [self.path]
+
+    def _run(self, callback: AudioCallback):
+        files = self.files()
+        if not files:
+            logging.warning(f"No audio files found at {self.path}")
+            return
+        silence = np.zeros(int(self.tail_silence * self.sample_rate), dtype=np.float32)
+        # Pacing is measured from this run's start, so count from zero after a restart
+        self.samples_delivered = 0
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            for file in files:
+                audio = np.concatenate((read_audio_file(file, self.sample_rate), silence))
+                for offset in range(0, len(audio), self.block_size):
+                    if self._stop.is_set():
+                        return
+                    self._deliver(callback, audio[offset:offset + self.block_size])
+                    self.samples_delivered += min(self.block_size, len(audio) - offset)
+                    if self.speed > 0:
+                        # Pace against the start so timing errors don't accumulate
+                        due = started + self.samples_delivered / self.sample_rate / self.speed
+                        delay = due - time.perf_counter()
+                        if delay > 0:
+                            self._stop.wait(delay)
+            if not self.loop:
+                return
+
+
+class SocketSource(_ThreadedSource):
+    """Listens for TCP clients streaming raw mono PCM.
+
+    Samples are little-endian int16 (or float32 with dtype='float32') at
+    the source's sample rate. One client is served at a time; when it
+    disconnects the next one is accepted.
+    """
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 7000, sample_rate: int = 16000,
+                 block_size: int = 1600, dtype: str = 'int16'):
+        super().__init__(sample_rate, block_size)
+        self.host = host
+        self.port = port
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self._server = None
+
+    def start(self, callback: AudioCallback):
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((self.host, self.port))
+        self._server.listen(1)
+        self._server.settimeout(0.5)
+        self.port = self._server.getsockname()[1]
+        super().start(callback)
+
+    def stop(self):
+        super().stop()
+        if self._server:
+            self._server.close()
+            self._server = None
+
+    def _run(self, callback: AudioCallback):
+        block_bytes = self.block_size * self.dtype.itemsize
+        while not self._stop.is_set():
+            try:
+                conn, address = self._server.accept()
+            except socket.timeout:
+                continue
+            logging.info(f"Audio client connected from {address}")
+            conn.settimeout(0.5)
+            buffer = bytearray()
+            with conn:
+                while not self._stop.is_set():
+                    try:
+                        data = conn.recv(block_bytes)
+                    except socket.timeout:
+                        continue
+                    if not data:
+                        break
+                    buffer.extend(data)
+                    usable = len(buffer) - len(buffer) % block_bytes
+                    if usable:
+                        samples = np.frombuffer(bytes(buffer[:usable]), dtype=self.dtype)
+                        del buffer[:usable]
+                        if self.dtype.kind == 'i':
+                            samples = samples.astype(np.float32) / 32768.0
+                        for offset in range(0, len(samples), self.block_size):
+                            self._deliver(callback, samples[offset:offset + self.block_size])
+            logging.info(f"Audio client {address} disconnected")
+
+
+def create_audio_source(spec: str = 'mic', sample_rate: int = 16000, block_size: int = 1600,
+                        **kwargs) -> AudioSource:
+    """Build a source from 'mic', 'tcp://host:port' or a file/directory path"""
+    if spec == 'mic':
+        return MicrophoneSource(sample_rate, block_size, **kwargs)
+    if spec.startswith('tcp://'):
+        host, _, port = spec[len('tcp://'):].rpartition(':')
+        return SocketSource(host or '0.0.0.0', int(port), sample_rate, block_size, **kwargs)
+    if Path(spec).exists():
+        return FileSource(spec, sample_rate, block_size, **kwargs)
+    raise ValueError(f"Unknown audio source: {spec}")
@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class PartialTranscript:
+    """A hypothesis for an utterance that may still be in progress.
+
+    stable is a prefix of text that consecutive decodes agreed on and
+    won't be revised; the rest of text may still change. The last
+    transcript of an utterance has final=True and stable == text.
+    """
+    utterance_id: int
+    text: str
+    stable: str
+    final: bool = False
+
+    @property
+    def unstable(self) -> str:
+        return self.text[len(self.stable):].strip()
+
+
+class HypothesisStabilizer:
+    """Local agreement between consecutive hypotheses of one utterance.
+
+    Words are committed once two decodes in a row agree on them, and
+    committed words are never taken back even if a later decode
+    disagrees.
+    """
+
+    def __init__(self, utterance_id: int = 0):
+        self.utterance_id = utterance_id
+        self._previous = []
+        self._committed = []
+
+    @property
+    def in_progress(self) -> bool:
+        return bool(self._previous)
+
+    def update(self, text: str) -> PartialTranscript:
+        words = text.split()
+        agreed = 0
+        for ours, theirs in zip(words, self._previous):
+            if ours.lower().strip('.,!?') != theirs.lower().strip('.,!?'):
+                break
+            agreed += 1
+        if agreed > len(self._committed):
+            self._committed = words[:agreed]
+        self._previous = words
+
+        # Keep committed words in front even if this decode changed them
+        committed = len(self._committed)
+        if words[:committed] != self._committed:
+            words = self._committed + words[committed:]
+        return PartialTranscript(self.utterance_id, " ".join(words), " ".join(self._committed))
+
+    def finish(self, text: str) -> PartialTranscript:
+        """The final transcript; the stabilizer moves on to the next utterance"""
+        transcript = PartialTranscript(self.utterance_id, text, text, final=True)
+        self.utterance_id += 1
+        self._previous = []
+        self._committed = []
+        return transcript
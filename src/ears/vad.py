@@ -0,0 +1,208 @@
+from abc import ABC, abstractmethod
+import logging
+from typing import List, Optional
+import numpy as np
+from src.ears.audio_buffer import AudioRingBuffer, rms
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+
+class VoiceActivityDetector(ABC):
+    """Decides whether a block of float32 samples contains speech"""
+
+    @abstractmethod
+    def is_speech(self, block: np.ndarray) -> bool:
+        pass
+
+    def reset(self):
+        pass
+
+
+class EnergyVAD(VoiceActivityDetector):
+    """Fixed RMS threshold, the original speech gate"""
+
+    def __init__(self, threshold: float = 0.05):
+        self.threshold = threshold
+
+    def is_speech(self, block: np.ndarray) -> bool:
+        return rms(block) > self.threshold
+
+
+class SpectralVAD(VoiceActivityDetector):
+    """Energy, zero-crossing rate and spectral flatness over a tracked noise floor.
+
+    A block counts as speech when it is clearly louder than the noise
+    floor and looks like voice: steady noise has a flat spectrum and
+    hiss has a high zero-crossing rate. The noise floor follows quiet
+    blocks quickly and loud ones slowly, so it adapts to the room
+    without learning speech as noise.
+    """
+
+    def __init__(self, sample_rate: int = 16000, energy_ratio_db: float = 6.0,
+                 min_energy: float = 0.002, max_flatness: float = 0.45,
+                 max_zero_crossing_rate: float = 0.35, band=(80.0, 4000.0)):
+        self.sample_rate = sample_rate
+        self.energy_ratio = 10 ** (energy_ratio_db / 20.0)
+        self.min_energy = min_energy
+        self.max_flatness = max_flatness
+        self.max_zero_crossing_rate = max_zero_crossing_rate
+        self.band = band
+        self.noise_floor = None
+        self._window = None
+        self._band_slice = None
+
+    def reset(self):
+        self.noise_floor = None
+
+    def _prepare(self, size: int):
+        if self._window is None or len(self._window) != size:
+            self._window = np.hanning(size).astype(np.float32)
+            freqs = np.fft.rfftfreq(size, 1.0 / self.sample_rate)
+            low, high = np.searchsorted(freqs, self.band)
+            self._band_slice = slice(max(low, 1), max(high, low + 2))
+
+    def features(self, block: np.ndarray):
+        """(rms, zero crossing rate, spectral flatness) of a block"""
+        self._prepare(len(block))
+        energy = rms(block)
+        signs = np.signbit(block)
+        zero_crossing_rate = np.count_nonzero(signs[1:] != signs[:-1]) / max(len(block) - 1, 1)
+        power = np.abs(np.fft.rfft(block * self._window))[self._band_slice] ** 2 + 1e-12
+        flatness = float(np.exp(np.mean(np.log(power))) / np.mean(power))
+        return energy, zero_crossing_rate, flatness
+
+    def is_speech(self, block: np.ndarray) -> bool:
+        energy, zero_crossing_rate, flatness = self.features(block)
+        if self.noise_floor is None:
+            self.noise_floor = energy
+
+        loud = energy > max(self.noise_floor * self.energy_ratio, self.min_energy)
+        voiced = flatness < self.max_flatness and zero_crossing_rate < self.max_zero_crossing_rate
+        speech = loud and voiced
+
+        # Quiet blocks pull the floor down fast, others push it up slowly
+        rate = 0.3 if energy < self.noise_floor else (0.01 if speech else 0.05)
+        self.noise_floor += rate * (energy - self.noise_floor)
+        return speech
+
+
+class WebRTCVAD(VoiceActivityDetector):
+    """WebRTC's GMM voice detector over 30 ms frames, if installed"""
+
+    def __init__(self, sample_rate: int = 16000, aggressiveness: int = 2, min_voiced_ratio: float = 0.5):
+        if webrtcvad is None:
+            raise ImportError("webrtcvad is not installed")
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * 30 // 1000
+        self.min_voiced_ratio = min_voiced_ratio
+
+    def is_speech(self, block: np.ndarray) -> bool:
+        pcm = (np.clip(block, -1.0, 1.0) * 32767).astype(np.int16)
+        frames = len(pcm) // self.frame_samples
+        if frames == 0:
+            return False
+        voiced = sum(
+            self.vad.is_speech(pcm[i * self.frame_samples:(i + 1) * self.frame_samples].tobytes(), self.sample_rate)
+            for i in range(frames)
+        )
+        return voiced / frames >= self.min_voiced_ratio
+
+
+def create_vad(name: str = 'spectral', sample_rate: int = 16000, **kwargs) -> VoiceActivityDetector:
+    """Build a detector by name: 'energy', 'spectral' or 'webrtc'"""
+    if name == 'energy':
+        return EnergyVAD(**kwargs)
+    if name == 'webrtc':
+        try:
+            return WebRTCVAD(sample_rate, **kwargs)
+        except ImportError:
+            logging.warning("webrtcvad is not installed, using the spectral detector")
+            return SpectralVAD(sample_rate)
+    if name == 'spectral':
+        return SpectralVAD(sample_rate, **kwargs)
+    raise ValueError(f"Unknown voice activity detector: {name}")
+
+
+class SpeechGate:
+    """Turns a stream of blocks into utterances using a detector.
+
+    Audio shortly before speech starts (pre-roll) is kept so the first
+    syllable isn't lost, and speech only ends after hangover seconds of
+    non-speech so short pauses don't split an utterance. Utterances
+    shorter than min_speech seconds are dropped.
+    """
+
+    def __init__(self, vad: VoiceActivityDetector, sample_rate: int = 16000,
+                 hangover: float = 1.0, pre_roll: float = 0.3,
+                 min_speech: float = 0.5, max_utterance: float = 30.0):
+        self.vad = vad
+        self.sample_rate = sample_rate
+        self.hangover_samples = int(hangover * sample_rate)
+        self.min_speech_samples = int(min_speech * sample_rate)
+        self.pre_roll = AudioRingBuffer(max(int(pre_roll * sample_rate), 1), max(int(pre_roll * sample_rate), 1))
+        self.buffer = AudioRingBuffer(sample_rate * 2, int(max_utterance * sample_rate))
+        self.in_speech = False
+        self._silent_samples = 0
+        self._speech_samples = 0
+
+    def reset(self):
+        self.pre_roll.clear()
+        self.buffer.clear()
+        self.vad.reset()
+        self.in_speech = False
+        self._silent_samples = 0
+        self._speech_samples = 0
+
+    def current(self) -> np.ndarray:
+        """A copy of the utterance in progress, empty between utterances"""
+        first, second = self.buffer.views()
+        return np.concatenate((first, second))
+
+    def process(self, block: np.ndarray) -> List[np.ndarray]:
+        """Feed one block; returns any utterances it completed"""
+        utterances = []
+        speech = self.vad.is_speech(block)
+
+        if not self.in_speech:
+            if not speech:
+                self.pre_roll.write(block, overwrite=True)
+                return utterances
+            # Speech starts: keep the pre-roll in front of it
+            self.in_speech = True
+            first, second = self.pre_roll.views()
+            self._append(first, utterances)
+            self._append(second, utterances)
+            self.pre_roll.clear()
+
+        self._append(block, utterances)
+        if speech:
+            self._silent_samples = 0
+            self._speech_samples += len(block)
+        else:
+            self._silent_samples += len(block)
+            if self._silent_samples >= self.hangover_samples:
+                utterance = self._finish()
+                if utterance is not None:
+                    utterances.append(utterance)
+        return utterances
+
+    def _append(self, samples: np.ndarray, utterances: list):
+        written = self.buffer.write(samples)
+        if written < len(samples):
+            # Longer than the model's window: hand off what we have
+            utterances.append(self.buffer.take())
+            self.buffer.write(samples[written:])
+
+    def _finish(self) -> Optional[np.ndarray]:
+        enough = self._speech_samples >= self.min_speech_samples
+        self.in_speech = False
+        self._silent_samples = 0
+        self._speech_samples = 0
+        if not enough:
+            self.buffer.clear()
+            return None
+        return self.buffer.take()
@@ -1,36 +1,80 @@
-from transformers import WhisperProcessor, WhisperForConditionalGeneration
-import sounddevice as sd
 import numpy as np
 import logging
 import threading
 import queue
-import collections
 import time
-from transformers import logging as transformers_logging
-
-transformers_logging.set_verbosity_error()
+from src.ears.asr import ASRBackend, create_asr_backend, load_whisper
+from src.ears.audio_source import AudioSource, create_audio_source
+from src.ears.streaming import HypothesisStabilizer, PartialTranscript
+from src.ears.vad import SpeechGate, create_vad
 
 class WhisperManager:
-    def __init__(self, threshold=0.05):
-        # Initialize Whisper model and processor silently
+    def __init__(self, threshold=0.05, model_name="openai/whisper-small", vad="spectral",
+                 hangover=1.0, pre_roll=0.3, backend="transformers", streaming=False,
+                 partial_interval=1.0, source="mic", source_options=None, **backend_options):
+        # backend is 'transformers', 'faster-whisper' or an ASRBackend; options
+        # such as model_size, quantize and beam_size are passed through
         try:
-            self.processor = WhisperProcessor.from_pretrained("openai/whisper-small")
-            self.model = WhisperForConditionalGeneration.from_pretrained("openai/whisper-small")
-            logging.info("Whisper model loaded successfully")
+            if isinstance(backend, str):
+                if backend == 'transformers' and 'model_size' not in backend_options:
+                    backend_options.setdefault('model_name', model_name)
+                backend = create_asr_backend(backend, **backend_options)
+            self.backend: ASRBackend = backend
         except Exception as e:
             logging.error(f"Failed to load Whisper model: {e}")
             raise
 
         self.threshold = threshold
         self.audio_queue = queue.Queue()
-        self.buffer = collections.deque(maxlen=32000)  # 2 seconds at 16kHz
         self.sample_rate = 16000
         self.channels = 1
         self.is_listening = False
-        self.stream = None
-        self.last_speech_time = None
-        self.silence_duration = 1.0
         self.min_speech_length = 0.5  # Minimum speech duration to process
+        # Utterances longer than Whisper's 30 second window are split
+        self.max_utterance_length = 30.0
+        
+        # source is 'mic', 'tcp://host:port', a WAV/FLAC file or directory,
+        # or an AudioSource; every source feeds the same gate and worker
+        if isinstance(source, str):
+            source = create_audio_source(
+                source,
+                self.sample_rate,
+                int(self.sample_rate * 0.1),  # 100ms blocks
+                **(source_options or {})
+            )
+        self.source: AudioSource = source
+
+        # vad is 'spectral', 'energy' (RMS above threshold), 'webrtc' or a detector
+        if isinstance(vad, str):
+            kwargs = {'threshold': threshold} if vad == 'energy' else {}
+            vad = create_vad(vad, self.sample_rate, **kwargs)
+        self.gate = SpeechGate(
+            vad,
+            sample_rate=self.sample_rate,
+            hangover=hangover,
+            pre_roll=pre_roll,
+            min_speech=self.min_speech_length,
+            max_utterance=self.max_utterance_length
+        )
+        
+        # Utterances are transcribed on a worker thread and fanned out to
+        # listener inboxes, so callers never wait on the model
+        self.max_inbox_size = 100
+        self._inboxes = []
+        self._inboxes_lock = threading.Lock()
+        self._default_inbox = self.open_inbox()
+        self._worker = None
+        self._worker_stop = threading.Event()
+
+        # In streaming mode the utterance so far is decoded every
+        # partial_interval seconds of audio while speech continues
+        self.streaming = streaming
+        self.partial_interval = partial_interval
+        self._partial_inboxes = []
+        self._partial_audio = None  # Latest snapshot; older ones are skipped
+        self._partial_lock = threading.Lock()
+        self._since_partial = 0
+        self._stabilizer = HypothesisStabilizer()
 
     def audio_callback(self, indata, frames, time_info, status):
         """Handle incoming audio data"""
@@ -39,44 +83,129 @@ class WhisperManager:
             return
 
         try:
-            audio = indata.flatten()
-            rms = np.sqrt(np.mean(audio**2))
-            current_time = time.time()
-
-            # Only process if volume is above threshold
-            if rms > self.threshold:
-                self.buffer.extend(audio)
-                self.last_speech_time = current_time
-            elif self.last_speech_time is not None:
-                # Add a bit more audio after speech ends
-                self.buffer.extend(audio)
-                
-                # If silence duration exceeded and we have enough audio
-                if (current_time - self.last_speech_time > self.silence_duration and 
-                    len(self.buffer) > self.sample_rate * self.min_speech_length):
-                    
-                    # Process the audio
-                    audio_data = np.array(list(self.buffer))
-                    self.audio_queue.put(audio_data)
-                    self.buffer.clear()
-                    self.last_speech_time = None
+            # First channel as a float32 view; no copy for mono float32 input
+            audio = np.asarray(indata[:, 0], dtype=np.float32)
+            
+            # Only utterances the detector judged to be speech reach Whisper
+            for utterance in self.gate.process(audio):
+                with self._partial_lock:
+                    self._partial_audio = None
+                self._since_partial = 0
+                self.audio_queue.put(utterance)
+
+            if self.streaming and self.gate.in_speech:
+                self._since_partial += len(audio)
+                if self._since_partial >= self.partial_interval * self.sample_rate:
+                    self._since_partial = 0
+                    snapshot = self.gate.current()
+                    with self._partial_lock:
+                        self._partial_audio = snapshot
 
         except Exception as e:
             logging.error(f"Error in audio callback: {e}")
 
+    def open_inbox(self, partials: bool = False) -> queue.Queue:
+        """Get a queue that receives every transcript from now on.
+
+        Inboxes get final transcripts as strings. With partials=True they
+        get PartialTranscripts instead, including in-progress hypotheses
+        when streaming.
+        """
+        inbox = queue.Queue(maxsize=self.max_inbox_size)
+        with self._inboxes_lock:
+            (self._partial_inboxes if partials else self._inboxes).append(inbox)
+        return inbox
+
+    def close_inbox(self, inbox: queue.Queue):
+        with self._inboxes_lock:
+            for inboxes in (self._inboxes, self._partial_inboxes):
+                if inbox in inboxes:
+                    inboxes.remove(inbox)
+
+    def get_transcripts(self, inbox: queue.Queue = None) -> list:
+        """Drain an inbox without blocking"""
+        inbox = inbox or self._default_inbox
+        transcripts = []
+        while True:
+            try:
+                transcripts.append(inbox.get_nowait())
+            except queue.Empty:
+                return transcripts
+
+    def _publish(self, transcription, partials: bool = False):
+        with self._inboxes_lock:
+            inboxes = list(self._partial_inboxes if partials else self._inboxes)
+        for inbox in inboxes:
+            try:
+                inbox.put_nowait(transcription)
+            except queue.Full:
+                # Nobody is reading this inbox; keep the newest transcripts
+                try:
+                    inbox.get_nowait()
+                    inbox.put_nowait(transcription)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def _start_worker(self):
+        if self._worker and self._worker.is_alive():
+            if not self._worker_stop.is_set():
+                return
+            # A stopping worker may still be finishing its last utterance
+            self._worker.join()
+        self._worker_stop.clear()
+        self._worker = threading.Thread(target=self._transcription_loop, name="WhisperTranscriber")
+        self._worker.daemon = True
+        self._worker.start()
+
+    def _transcription_loop(self):
+        # Runs until the None that stop_listening queues, so every utterance
+        # captured before the stop is still transcribed
+        while True:
+            try:
+                audio_data = self.audio_queue.get(timeout=0.1 if self.streaming else 0.5)
+            except queue.Empty:
+                # Finished utterances go first; partials fill idle time
+                if not self._worker_stop.is_set():
+                    self._transcribe_partial()
+                continue
+            if audio_data is None:
+                self.audio_queue.task_done()
+                return
+            try:
+                transcription = self.transcribe_audio(audio_data)
+                if transcription:
+                    logging.debug(f"Transcribed: {transcription}")
+                    self._publish(transcription)
+                    self._publish(self._stabilizer.finish(transcription), partials=True)
+                elif self._stabilizer.in_progress:
+                    # Close the partials we sent even though nothing was said
+                    self._publish(self._stabilizer.finish(""), partials=True)
+            finally:
+                self.audio_queue.task_done()
+
+    def wait_for_transcripts(self):
+        """Block until every utterance captured so far has been transcribed"""
+        self.audio_queue.join()
+
+    def _transcribe_partial(self):
+        with self._partial_lock:
+            audio_data, self._partial_audio = self._partial_audio, None
+        if audio_data is None:
+            return
+        transcription = self.transcribe_audio(audio_data)
+        if transcription:
+            partial: PartialTranscript = self._stabilizer.update(transcription)
+            logging.debug(f"Partial: [{partial.stable}] {partial.unstable}")
+            self._publish(partial, partials=True)
+
     def start_listening(self):
         """Start listening for audio input"""
         if self.is_listening:
             return
+        self._start_worker()
 
         try:
-            self.stream = sd.InputStream(
-                callback=self.audio_callback,
-                channels=self.channels,
-                samplerate=self.sample_rate,
-                blocksize=int(self.sample_rate * 0.1)  # 100ms blocks
-            )
-            self.stream.start()
+            self.source.start(self.audio_callback)
             self.is_listening = True
             logging.debug("Started audio stream")
         except Exception as e:
@@ -90,16 +219,17 @@ class WhisperManager:
             return
 
         try:
-            if self.stream:
-                self.stream.stop()
-                self.stream.close()
+            self.source.stop()
             self.is_listening = False
-            self.buffer.clear()
+            self.gate.reset()
+            with self._partial_lock:
+                self._partial_audio = None
+            self._since_partial = 0
+            self._worker_stop.set()
+            self.audio_queue.put(None)
             logging.debug("Stopped audio stream")
         except Exception as e:
             logging.error(f"Error stopping audio stream: {e}")
-        finally:
-            self.stream = None
 
     def transcribe_audio(self, audio_data):
         """Transcribe audio data to text"""
@@ -107,18 +237,7 @@ class WhisperManager:
             if len(audio_data) < self.sample_rate * self.min_speech_length:
                 return None
 
-            input_features = self.processor(
-                audio_data, 
-                sampling_rate=self.sample_rate, 
-                return_tensors="pt"
-            ).input_features
-
-            predicted_ids = self.model.generate(input_features)
-            transcription = self.processor.batch_decode(
-                predicted_ids, 
-                skip_special_tokens=True
-            )[0].strip()
-
+            transcription = self.backend.transcribe(audio_data, self.sample_rate)
             return transcription if transcription else None
 
         except Exception as e:
@@ -126,23 +245,37 @@ class WhisperManager:
             return None
 
     def listen_and_transcribe(self, timeout=3.0):
-        """Listen for speech and return transcription"""
+        """Wait up to timeout for the next transcript"""
         try:
-            # Get audio from queue with timeout
-            try:
-                audio_data = self.audio_queue.get(timeout=timeout)
-            except queue.Empty:
-                return None
+            return self._default_inbox.get(timeout=timeout)
+        except queue.Empty:
+            return None
 
-            # Transcribe if we got audio
-            if len(audio_data) > 0:
-                transcription = self.transcribe_audio(audio_data)
-                if transcription and len(transcription) > 0:
-                    logging.debug(f"Transcribed: {transcription}")
-                    return transcription
 
-            return None
+class NullEars:
+    """Stands in for WhisperManager for characters that never listen.
 
-        except Exception as e:
-            logging.error(f"Error in listen_and_transcribe: {e}")
-            return None
+    Nothing is loaded or opened, so a host of deaf characters doesn't pay
+    for a speech model.
+    """
+
+    is_listening = False
+    streaming = False
+
+    def open_inbox(self, partials: bool = False) -> queue.Queue:
+        return queue.Queue()
+
+    def close_inbox(self, inbox: queue.Queue):
+        pass
+
+    def get_transcripts(self, inbox: queue.Queue = None) -> list:
+        return []
+
+    def start_listening(self):
+        pass
+
+    def stop_listening(self):
+        pass
+
+    def listen_and_transcribe(self, timeout=3.0):
+        return None
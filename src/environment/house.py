@@ -1,12 +1,24 @@
 # File: house.py
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
 from src.utils.models import Position, GameObject
-from src.utils.constants import RoomType, ObjectType
+from src.utils.constants import Direction, RoomType, ObjectType
 from collections import defaultdict
-from src.environment.objects import ObjectManager
+from src.environment.objects import ObjectManager, get_object_manager
+from src.environment.navigation import DIRECTION_OFFSETS, compute_paths
 from src.utils.position import Position
 
+# Bit per direction in the room adjacency masks
+DIRECTION_BITS = {
+    Direction.NORTH: 1,
+    Direction.SOUTH: 2,
+    Direction.EAST: 4,
+    Direction.WEST: 8
+}
+
 class Door:
+    __slots__ = ('locked', 'authorized_users')
+
     def __init__(self):
         self.locked = False
         self.authorized_users = set()  # Set of character names allowed to use the door
@@ -32,60 +44,176 @@ class Door:
     def remove_authorized_user(self, user: str):
         self.authorized_users.discard(user)
 
-class House:
-    def __init__(self, position: Position):
-        self.position = position
-        self.owner = None  # Add owner attribute
-        # Initialize default rooms
-        self.rooms = {
-            "hallway": {
-                "type": "HALLWAY",
-                "position": {"x": 0, "y": -1},
-                "objects": ["door", "doorbell"]
-            },
-            "bedroom": {
-                "type": "BEDROOM",
-                "position": {"x": 0, "y": 0},
-                "objects": ["bed"]
-            },
-            "bathroom": {
-                "type": "BATHROOM",
-                "position": {"x": 1, "y": 0},
-                "objects": ["toilet", "shower"]
-            },
-            "living_room": {
-                "type": "LIVING_ROOM",
-                "position": {"x": 0, "y": 1},
-                "objects": ["tv", "computer", "couch", "phone"]
-            },
-            "kitchen": {
-                "type": "KITCHEN",
-                "position": {"x": 1, "y": 1},
-                "objects": ["fridge", "stove"]
-            }
-        }
-        self.authorized_users = set()
+DEFAULT_ROOMS = {
+    "hallway": {
+        "type": "HALLWAY",
+        "position": {"x": 0, "y": -1},
+        "objects": ["door", "doorbell"]
+    },
+    "bedroom": {
+        "type": "BEDROOM",
+        "position": {"x": 0, "y": 0},
+        "objects": ["bed"]
+    },
+    "bathroom": {
+        "type": "BATHROOM",
+        "position": {"x": 1, "y": 0},
+        "objects": ["toilet", "shower"]
+    },
+    "living_room": {
+        "type": "LIVING_ROOM",
+        "position": {"x": 0, "y": 1},
+        "objects": ["tv", "computer", "couch", "phone"]
+    },
+    "kitchen": {
+        "type": "KITCHEN",
+        "position": {"x": 1, "y": 1},
+        "objects": ["fridge", "stove"]
+    }
+}
+
+class HouseTemplate:
+    """Immutable house layout shared by every house built from it.
+    
+    Holds the rooms and the lookup tables used by per-tick queries:
+    relative (x, y) -> RoomType, RoomType -> objects, (x, y) -> exit
+    bitmask of DIRECTION_BITS, and the shortest path between every pair
+    of rooms.
+    """
+    __slots__ = ('rooms', 'room_at', 'room_objects', 'exits', 'directions', 'available_rooms',
+                 'targets', 'paths')
+
+    def __init__(self, rooms: Dict[str, dict], object_manager: Optional[ObjectManager] = None):
+        object_manager = object_manager or get_object_manager()
+        
+        frozen_rooms = {}
+        room_at = {}
+        room_objects = {}
+        targets = {}  # Room or object name -> cells holding it
+        for room_name, room in rooms.items():
+            frozen_rooms[room_name] = MappingProxyType({
+                "type": room["type"],
+                "position": MappingProxyType(dict(room["position"])),
+                "objects": tuple(room["objects"])
+            })
+            room_type = RoomType[room["type"]]
+            room_at[(room["position"]["x"], room["position"]["y"])] = room_type
+            objects = (object_manager.get_house_item(name) for name in room["objects"])
+            room_objects[room_type] = tuple(obj for obj in objects if obj is not None)
+            cell = (room["position"]["x"], room["position"]["y"])
+            for name in {room_name, room_type.value, *room["objects"]}:
+                targets.setdefault(name, []).append(cell)
+        
+        exits = {}
+        directions = {}
+        for (x, y) in room_at:
+            mask = 0
+            for direction, (dx, dy) in DIRECTION_OFFSETS.items():
+                if (x + dx, y + dy) in room_at:
+                    mask |= DIRECTION_BITS[direction]
+            exits[(x, y)] = mask
+            directions[(x, y)] = tuple(
+                direction.value for direction in Direction if mask & DIRECTION_BITS[direction]
+            )
+        
+        self.rooms = MappingProxyType(frozen_rooms)
+        self.room_at = MappingProxyType(room_at)
+        self.room_objects = MappingProxyType(room_objects)
+        self.exits = MappingProxyType(exits)
+        self.directions = MappingProxyType(directions)
+        self.available_rooms = tuple(room_at.values())
+        self.targets = MappingProxyType({name: tuple(cells) for name, cells in targets.items()})
+        self.paths = MappingProxyType(compute_paths(room_at))
+
+    def with_room(self, room_name: str, room: dict) -> 'HouseTemplate':
+        """A new template with one room added or replaced"""
+        rooms = {name: _thaw_room(data) for name, data in self.rooms.items()}
+        rooms[room_name] = room
+        return HouseTemplate(rooms)
+
+_default_template = None
+
+def get_default_template() -> HouseTemplate:
+    """The shared template for houses without a custom layout"""
+    global _default_template
+    if _default_template is None:
+        _default_template = HouseTemplate(DEFAULT_ROOMS)
+    return _default_template
+
+def _thaw_room(room) -> dict:
+    return {
+        "type": room["type"],
+        "position": dict(room["position"]),
+        "objects": list(room["objects"])
+    }
+
+class HouseState:
+    """Mutable per-house state; everything else lives in the template"""
+    __slots__ = ('owner', 'front_door', 'doorbell_queue', 'object_wear')
+
+    def __init__(self):
+        self.owner = None
         self.front_door = Door()
         self.doorbell_queue = []  # Store visitors waiting at door
+        self.object_wear = None  # Object name -> wear, created on first use
+
+class House:
+    __slots__ = ('position', 'template', 'state')
+
+    def __init__(self, position: Position, template: Optional[HouseTemplate] = None):
+        self.position = position
+        self.template = template or get_default_template()
+        self.state = HouseState()
+
+    @property
+    def owner(self) -> Optional[str]:
+        return self.state.owner
+
+    @owner.setter
+    def owner(self, owner: Optional[str]):
+        self.state.owner = owner
+
+    @property
+    def rooms(self):
+        """Read-only room layout; use set_room to customize this house"""
+        return self.template.rooms
+
+    @property
+    def front_door(self) -> Door:
+        return self.state.front_door
+
+    @property
+    def authorized_users(self) -> set:
+        return self.state.front_door.authorized_users
+
+    @property
+    def doorbell_queue(self) -> List[str]:
+        return self.state.doorbell_queue
+
+    def set_room(self, room_name: str, room: dict):
+        """Add or replace a room in this house only.
+        
+        The shared template is left untouched; this house gets its own copy.
+        """
+        self.template = self.template.with_room(room_name, room)
+
+    def wear_object(self, object_name: str, amount: float):
+        if self.state.object_wear is None:
+            self.state.object_wear = {}
+        self.state.object_wear[object_name] = self.state.object_wear.get(object_name, 0.0) + amount
+
+    def get_object_wear(self, object_name: str) -> float:
+        if not self.state.object_wear:
+            return 0.0
+        return self.state.object_wear.get(object_name, 0.0)
+
+    def _relative(self, position: Position) -> Tuple[int, int]:
+        return position.x - self.position.x, position.y - self.position.y
 
     def get_room(self, position: Position) -> RoomType:
         """Get the room type at the given position"""
-        # Convert position to room coordinates relative to house
-        rel_x = position.x - self.position.x
-        rel_y = position.y - self.position.y
-        
-        # Look up room by relative position
-        for room in self.rooms.values():
-            room_pos = room["position"]
-            if room_pos["x"] == rel_x and room_pos["y"] == rel_y:
-                return RoomType[room["type"]]
-        
         # Default to LIVING_ROOM if room not found
-        return RoomType.LIVING_ROOM
-
-    def authorize_user(self, user_name: str):
-        """Authorize a user to access the house"""
-        self.authorized_users.add(user_name)
+        return self.template.room_at.get(self._relative(position), RoomType.LIVING_ROOM)
 
     def is_authorized(self, user_name: str) -> bool:
         """Check if a user is authorized to access the house"""
@@ -93,22 +221,40 @@ class House:
 
     def get_available_rooms(self) -> List[RoomType]:
         """Get list of available rooms in the house"""
-        return [RoomType[room["type"]] for room in self.rooms.values()]
+        return list(self.template.available_rooms)
 
-    def get_objects_in_room(self, room_type: RoomType) -> List[str]:
-        """Get list of objects in a specific room"""
+    def get_objects_in_room(self, room_type: RoomType) -> Tuple[GameObject, ...]:
+        """Get the objects in a specific room"""
         # If passed a Position instead of RoomType, get the room type first
         if isinstance(room_type, Position):
             room_type = self.get_room(room_type)
-        
-        # Now look up objects for this room type
-        for room in self.rooms.values():
-            if room["type"] == room_type.value:
-                return room["objects"]
-        return []
+        return self.template.room_objects.get(room_type, ())
 
     def is_valid_move(self, position: Position) -> bool:
-        return position in self.rooms
+        """Check if there is a room at the given position"""
+        return self._relative(position) in self.template.room_at
+
+    def get_exits(self, position: Position) -> int:
+        """Bitmask of DIRECTION_BITS leading to a neighbouring room"""
+        return self.template.exits.get(self._relative(position), 0)
+
+    def get_available_directions(self, position: Position) -> Tuple[str, ...]:
+        """Direction names leading to a neighbouring room"""
+        return self.template.directions.get(self._relative(position), ())
+
+    def find_path(self, position: Position, target: str) -> Optional[Tuple[Direction, ...]]:
+        """Shortest moves from position to the nearest room or object named target"""
+        start = self._relative(position)
+        best = None
+        for cell in self.template.targets.get(target, ()):
+            path = self.template.paths.get((start, cell))
+            if path is not None and (best is None or len(path) < len(best)):
+                best = path
+        return best
+
+    def get_destinations(self) -> List[str]:
+        """Room and object names that find_path understands"""
+        return list(self.template.targets)
 
     def can_enter_house(self, character_name: str) -> bool:
         """Check if a character can enter the house through the front door"""
@@ -142,16 +288,10 @@ class House:
         """Serialize house state"""
         return {
             'rooms': {
-                f"{pos.x},{pos.y}": room.value
-                for pos, room in self.rooms.items()
-            },
-            'objects': {
-                f"{pos.x},{pos.y}": [
-                    obj.serialize() if obj else None
-                    for obj in objects
-                ]
-                for pos, objects in self.objects.items()
+                room_name: _thaw_room(room)
+                for room_name, room in self.rooms.items()
             },
+            'owner': self.owner,
             'authorized_users': list(self.authorized_users)
         }
 
@@ -2,12 +2,13 @@ import json
 import os
 from typing import Dict, List, Optional
 from src.utils.models import Position
-from src.environment.house import House
-from src.utils.constants import RoomType, ObjectType
+from src.environment.house import House, HouseTemplate, get_default_template
 
 class HouseManager:
     def __init__(self):
         self.houses: Dict[str, Dict] = {}
+        self._houses_by_position: Dict[Position, Dict] = {}
+        self._templates: Dict[str, HouseTemplate] = {}
         self.load_houses()
 
     def load_houses(self):
@@ -19,6 +20,18 @@ class HouseManager:
         except FileNotFoundError:
             print(f"Warning: Houses database not found at {houses_path}")
             self.houses = {}
+        self._index_houses()
+
+    def _index_houses(self):
+        """Rebuild the position lookup table"""
+        self._houses_by_position = {}
+        for house in self.houses.values():
+            self._index_house(house)
+
+    def _index_house(self, house):
+        if isinstance(house, dict) and 'position' in house:
+            house_pos = Position(house['position']['x'], house['position']['y'])
+            self._houses_by_position.setdefault(house_pos, house)
 
     def save_houses(self):
         """Save current house states back to JSON"""
@@ -32,11 +45,7 @@ class HouseManager:
 
     def get_house_by_position(self, position: Position) -> Optional[Dict]:
         """Find house at given position"""
-        for house in self.houses.values():
-            house_pos = Position(house['position']['x'], house['position']['y'])
-            if house_pos == position:
-                return house
-        return None
+        return self._houses_by_position.get(position)
 
     def assign_house_to_owner(self, house_id: str, owner: str) -> bool:
         """Assign a house to an owner"""
@@ -46,37 +55,24 @@ class HouseManager:
             return True
         return False
 
+    def get_template(self, house_id: str) -> HouseTemplate:
+        """Get the shared layout for a house, building it on first use"""
+        template = self._templates.get(house_id)
+        if template is None:
+            house_data = self.houses.get(house_id)
+            if house_data and house_data.get('rooms'):
+                template = HouseTemplate(house_data['rooms'])
+            else:
+                template = get_default_template()
+            self._templates[house_id] = template
+        return template
+
     def create_house_instance(self, house_id: str) -> House:
         """Create a House instance from house data"""
-        house = House()  # Create base house instance with default layout
-        
-        if house_id in self.houses:
-            house_data = self.houses[house_id]
-            
-            # Clear default layout
-            house.rooms.clear()
-            house.objects.clear()
-            
-            # Add rooms and objects from house data
-            for room_id, room_data in house_data['rooms'].items():
-                pos = Position(room_data['position']['x'], room_data['position']['y'])
-                room_type = RoomType[room_data['type']]
-                house.rooms[pos] = room_type
-                
-                # Create a new list for objects in this room
-                house.objects[pos] = []
-                
-                # Add objects to room
-                for obj_name in room_data['objects']:
-                    game_object = house.object_manager.get_house_item(obj_name)
-                    if game_object:
-                        house.objects[pos].append(game_object)
-                        print(f"Added {obj_name} to room at {pos}")
-        
-        # Verify objects were created properly
-        for pos, objects in house.objects.items():
-            print(f"Room at {pos} has objects: {[obj.type.value for obj in objects]}")
-        
+        house_data = self.houses.get(house_id) or {}
+        position = house_data.get('position', {'x': 0, 'y': 0})
+        house = House(Position(position['x'], position['y']), self.get_template(house_id))
+        house.owner = house_data.get('owner')
         return house
 
     def get_owner_house(self, owner: str) -> Optional[Dict]:
@@ -96,7 +92,14 @@ class HouseManager:
             return False
         
         house_id = house_data['id']
+        replaced = self.houses.get(house_id)
         self.houses[house_id] = house_data
+        self._templates.pop(house_id, None)
+        if replaced is None:
+            self._index_house(house_data)
+        else:
+            # The old entry may hide another house at its position
+            self._index_houses()
         self.save_houses()
         return True
   
\ No newline at end of file
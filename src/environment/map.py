@@ -2,13 +2,14 @@ import json
 import os
 from typing import Dict, List, Optional
 from src.utils.models import Position
+from src.utils.spatial import SpatialGrid
 from src.environment.house import House
 from src.environment.world_state import WorldState
 import logging
 import time
 
 class GameMap:
-    def __init__(self):
+    def __init__(self, world_state: Optional[WorldState] = None):
         # Initialize logger first
         self.logger = logging.getLogger("GameMap")
         
@@ -18,9 +19,28 @@ class GameMap:
         self.character_positions = {}
         self.plots: Dict[Position, House] = {}
         
+        # Spatial indexes, kept current by touch_plot and set_character_position
+        self.plot_grid = SpatialGrid()
+        self.character_grid = SpatialGrid()
+        self._free_plots: Dict[Position, None] = {}  # Ordered set of unowned plots
+        self._plot_owners: Dict[Position, str] = {}
+        self._plots_by_owner: Dict[str, Position] = {}
+        self._next_plot_slot = 0
+        
+        # Version stamps and cached fragments for serialization
+        self.plots_version = 0
+        self.characters_version = 0
+        self._character_versions: Dict[str, int] = {}
+        self._plot_fragments: Dict[Position, tuple] = {}
+        self._character_fragments: Dict[str, tuple] = {}
+        self._plots_cache = None
+        self._characters_cache = None
+        self._serialized_json = None
+        self._change_listeners = []
+        
         try:
             # Initialize world state
-            self.world_state = WorldState()
+            self.world_state = world_state or WorldState()
             self.logger.info("World state initialized")
             
             # Load map state and sync with world state
@@ -45,6 +65,7 @@ class GameMap:
                 if 'owner' in plot_data:
                     house.owner = plot_data['owner']
                 self.plots[pos] = house
+                self.touch_plot(pos)
                 
             self.logger.info(f"Loaded {len(self.plots)} plots from map configuration")
             
@@ -53,6 +74,7 @@ class GameMap:
             # Create a default plot if loading fails
             default_pos = Position(0, 0)
             self.plots[default_pos] = House(default_pos)
+            self.touch_plot(default_pos)
             
     def _sync_with_world_state(self):
         """Synchronize game map state with world state"""
@@ -65,6 +87,7 @@ class GameMap:
             for char_name, char_data in self.world_state.characters.items():
                 # Update characters dict
                 self.characters[char_name] = char_data
+                self.touch_character(char_name)
                 
                 # Update character positions
                 if 'position' in char_data:
@@ -72,7 +95,7 @@ class GameMap:
                         char_data['position']['x'],
                         char_data['position']['y']
                     )
-                    self.character_positions[char_name] = pos
+                    self.set_character_position(char_name, pos)
                 
                 # Update active characters
                 if char_data.get('online', False) and \
@@ -86,6 +109,7 @@ class GameMap:
             # Initialize empty state if sync fails
             self.characters = {}
             self.character_positions = {}
+            self.character_grid = SpatialGrid()
             self.active_characters = set()
             
     def register_character(self, character_data: dict) -> bool:
@@ -108,8 +132,9 @@ class GameMap:
             
             # Update local tracking
             self.characters[name] = character_data
-            self.character_positions[name] = pos
+            self.set_character_position(name, pos)
             self.active_characters.add(name)
+            self.touch_character(name)
             
             self.logger.info(f"Successfully registered character {name} at position {pos}")
             return True
@@ -131,39 +156,122 @@ class GameMap:
             # Update local tracking
             self.characters[name] = character_data
             self.active_characters.add(name)
+            self.touch_character(name)
             
             # Update position
             pos = Position(
                 character_data['position']['x'],
                 character_data['position']['y']
             )
-            self.character_positions[name] = pos
+            self.set_character_position(name, pos)
             
             # Update world state
             self.world_state.characters[name] = character_data
             self.world_state.set_character_position(name, pos)
             
-            self.logger.info(f"Successfully updated character {name}")
+            self.logger.debug(f"Successfully updated character {name}")
             return True
             
         except Exception as e:
             self.logger.error(f"Error updating character: {str(e)}")
             return False
-            
+
+    def unregister_character(self, name: str) -> bool:
+        """Mark a character offline; its last state and position are kept"""
+        try:
+            character_data = self.characters.get(name) or self.world_state.characters.get(name)
+            if character_data is None:
+                return False
+            character_data['online'] = False
+            character_data['last_update'] = time.time()
+            character_data['status'] = 'offline'
+
+            self.characters[name] = character_data
+            self.active_characters.discard(name)
+            self.world_state.characters[name] = character_data
+            self.world_state.set_character_online(name, False)
+            self.touch_character(name)
+
+            self.logger.info(f"Character {name} went offline")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error unregistering character: {str(e)}")
+            return False
+
+    def set_character_position(self, character_name: str, position: Position):
+        """Track a character's position locally and in the spatial index"""
+        self.character_positions[character_name] = position
+        self.character_grid.insert(character_name, position)
+
+    def get_characters_at(self, position: Position) -> List[str]:
+        """Names of characters standing at position"""
+        return self.character_grid.at(position)
+
+    def get_characters_near(self, position: Position, radius: float,
+                            exclude: Optional[str] = None) -> List[str]:
+        """Names of characters within radius of position, nearest first"""
+        return [
+            name for name, _ in self.character_grid.in_radius(position, radius)
+            if name != exclude
+        ]
+
+    def get_nearest_characters(self, position: Position, k: int = 1,
+                               exclude: Optional[str] = None) -> List[str]:
+        """Names of the k characters closest to position"""
+        return [name for name, _ in self.character_grid.nearest(position, k, exclude)]
+
+    def get_plots_near(self, position: Position, radius: float) -> List[Position]:
+        """Plot positions within radius of position, nearest first"""
+        return [pos for pos, _ in self.plot_grid.in_radius(position, radius)]
+
     def get_empty_plots(self) -> List[Position]:
         """Get list of unowned plots"""
-        return [pos for pos, house in self.plots.items() if not house.owner]
+        return list(self._free_plots)
+
+    def find_empty_plot(self, near: Optional[Position] = None) -> Optional[Position]:
+        """An unowned plot, the closest one to near if given"""
+        if not self._free_plots:
+            return None
+        if near is None:
+            return next(iter(self._free_plots))
+        # Search outwards until an unowned plot turns up
+        k = 8
+        while True:
+            nearest = self.plot_grid.nearest(near, k)
+            for pos, _ in nearest:
+                if pos in self._free_plots:
+                    return pos
+            if len(nearest) < k:
+                return None
+            k *= 4
+
+    def get_plot_by_owner(self, owner: str) -> Optional[Position]:
+        """Position of the plot owned by owner"""
+        return self._plots_by_owner.get(owner)
+
+    def next_open_plot_position(self, columns: int = 11) -> Position:
+        """First position without a plot, filling rows of the given width"""
+        # Plots are never removed, so every slot before the cursor is taken
+        while True:
+            slot = self._next_plot_slot
+            pos = Position(slot % columns, slot // columns)
+            if pos not in self.plots:
+                return pos
+            self._next_plot_slot += 1
         
     def assign_house_to_character(self, character_name: str, position: Position) -> bool:
         """Assign a house at the given position to a character"""
         # Create a new house if one doesn't exist at this position
         if position not in self.plots:
             self.plots[position] = House(position)
+            self.touch_plot(position)
             self.logger.info(f"Created new house at {position}")
         
         house = self.plots[position]
         if not house.owner:
             house.owner = character_name
+            self.touch_plot(position)
             # Add character to active characters set
             self.active_characters.add(character_name)
             # Update world state
@@ -174,6 +282,7 @@ class GameMap:
                 'last_update': time.time(),
                 'status': 'active'
             }
+            self.world_state.touch_character(character_name)
             self.logger.info(f"Assigned house at {position} to {character_name}")
             return True
         elif house.owner == character_name:
@@ -187,6 +296,7 @@ class GameMap:
                     'last_update': time.time(),
                     'status': 'active'
                 }
+                self.world_state.touch_character(character_name)
             return True  # Already owned by this character
         
         return False
@@ -204,16 +314,125 @@ class GameMap:
         for house in self.plots.values():
             house.update(delta_time)
             
-    def serialize(self) -> dict:
-        """Serialize game map state"""
+    def add_change_listener(self, listener):
+        """Register listener(kind, key) for map and world state changes"""
+        self._change_listeners.append(listener)
+        self.world_state.add_change_listener(listener)
+
+    def _notify_change(self, kind: str, key):
+        for listener in self._change_listeners:
+            try:
+                listener(kind, key)
+            except Exception as e:
+                self.logger.error(f"Error in change listener: {str(e)}")
+
+    def touch_character(self, character_name: str):
+        """Mark a character's cached serialization as stale"""
+        self.characters_version += 1
+        self._character_versions[character_name] = self.characters_version
+        self._notify_change('character', character_name)
+
+    def touch_plot(self, position: Position):
+        """Mark a plot's cached serialization as stale"""
+        self.plots_version += 1
+        self._plot_fragments.pop(position, None)
+        self._index_plot(position)
+        self._notify_change('plot', position)
+
+    def _index_plot(self, position: Position):
+        """Bring the plot indexes in line with the plot at position"""
+        house = self.plots.get(position)
+        old_owner = self._plot_owners.pop(position, None)
+        if old_owner is not None and self._plots_by_owner.get(old_owner) == position:
+            del self._plots_by_owner[old_owner]
+        if house is None:
+            self.plot_grid.remove(position)
+            self._free_plots.pop(position, None)
+            return
+        
+        self.plot_grid.insert(position, position)
+        if house.owner:
+            self._free_plots.pop(position, None)
+            self._plot_owners[position] = house.owner
+            self._plots_by_owner.setdefault(house.owner, position)
+        else:
+            self._free_plots[position] = None
+
+    def _get_plots_cache(self) -> tuple:
+        """Get (plot dicts, encoded plots), re-encoding only stale plots"""
+        if self._plots_cache is None or self._plots_cache[0] != self.plots_version:
+            fragments = {}
+            for pos, house in self.plots.items():
+                fragment = self._plot_fragments.get(pos)
+                if fragment is None:
+                    data = {
+                        'position': {'x': pos.x, 'y': pos.y},
+                        'owner': house.owner if house.owner else None
+                    }
+                    fragment = (data, json.dumps(data).encode())
+                fragments[pos] = fragment
+            self._plot_fragments = fragments
+            plots = [fragment[0] for fragment in fragments.values()]
+            encoded = b'[' + b', '.join(fragment[1] for fragment in fragments.values()) + b']'
+            self._plots_cache = (self.plots_version, plots, encoded)
+        return self._plots_cache[1], self._plots_cache[2]
+
+    def _get_characters_json(self) -> bytes:
+        """Get the encoded characters dict, re-encoding only stale entries"""
+        if self._characters_cache is None or self._characters_cache[0] != self.characters_version:
+            fragments = {}
+            for name, char_data in self.characters.items():
+                version = self._character_versions.get(name, 0)
+                fragment = self._character_fragments.get(name)
+                if fragment is None or fragment[0] != version:
+                    fragment = (version, f"{json.dumps(name)}: {json.dumps(char_data)}".encode())
+                fragments[name] = fragment
+            self._character_fragments = fragments
+            encoded = b'{' + b', '.join(fragment[1] for fragment in fragments.values()) + b'}'
+            self._characters_cache = (self.characters_version, encoded)
+        return self._characters_cache[1]
+
+    def serialize_json(self) -> bytes:
+        """Serialize game map state to encoded JSON.
+        
+        The result is cached until something changes, so the same bytes
+        can be sent to every client.
+        """
+        world_state_json = self.world_state.serialize_json()
+        cached = self._serialized_json
+        if (cached is not None and cached[0] == self.plots_version and
+                cached[1] == self.characters_version and cached[2] is world_state_json):
+            return cached[3]
+        
+        _, plots_json = self._get_plots_cache()
+        encoded = (b'{"plots": ' + plots_json +
+                   b', "characters": ' + self._get_characters_json() +
+                   b', "world_state": ' + world_state_json + b'}')
+        self._serialized_json = (self.plots_version, self.characters_version, world_state_json, encoded)
+        return encoded
+
+    def serialize_delta(self, character_names, plot_positions, world_character_names) -> dict:
+        """Serialize only the given entities, in the same shape as serialize()"""
         return {
             'plots': [
                 {
                     'position': {'x': pos.x, 'y': pos.y},
-                    'owner': house.owner if house.owner else None
+                    'owner': self.plots[pos].owner if self.plots[pos].owner else None
                 }
-                for pos, house in self.plots.items()
+                for pos in plot_positions if pos in self.plots
             ],
+            'characters': {
+                name: self.characters[name]
+                for name in character_names if name in self.characters
+            },
+            'world_state': self.world_state.serialize_delta(world_character_names)
+        }
+
+    def serialize(self) -> dict:
+        """Serialize game map state"""
+        plots, _ = self._get_plots_cache()
+        return {
+            'plots': list(plots),
             'characters': self.characters,
             'world_state': self.world_state.serialize()
         }
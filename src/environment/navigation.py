@@ -0,0 +1,44 @@
+# File: navigation.py
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+from src.utils.constants import Direction
+
+Cell = Tuple[int, int]
+
+DIRECTION_OFFSETS = {
+    Direction.NORTH: (0, -1),
+    Direction.SOUTH: (0, 1),
+    Direction.EAST: (1, 0),
+    Direction.WEST: (-1, 0)
+}
+
+
+def compute_paths(cells: Iterable[Cell]) -> Dict[Tuple[Cell, Cell], Tuple[Direction, ...]]:
+    """Shortest move sequence between every pair of connected cells.
+
+    Runs a breadth-first search from each cell over the grid adjacency.
+    House layouts have a handful of rooms, so the full table is tiny and
+    is built once per layout.
+    """
+    cells = set(cells)
+    paths = {}
+    for start in cells:
+        # Parent links back towards start, with the move that got us here
+        parents: Dict[Cell, Optional[Tuple[Cell, Direction]]] = {start: None}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            for direction, (dx, dy) in DIRECTION_OFFSETS.items():
+                neighbour = (cell[0] + dx, cell[1] + dy)
+                if neighbour in cells and neighbour not in parents:
+                    parents[neighbour] = (cell, direction)
+                    queue.append(neighbour)
+
+        for goal in parents:
+            moves = []
+            cell = goal
+            while parents[cell] is not None:
+                cell, direction = parents[cell]
+                moves.append(direction)
+            paths[(start, goal)] = tuple(reversed(moves))
+    return paths
@@ -59,3 +59,12 @@ class ObjectManager:
 
     def get_items_in_category(self, category: str) -> Dict[str, GameObject]:
         return self.store_items.get(category, {})
+
+_shared_manager = None
+
+def get_object_manager() -> ObjectManager:
+    """Item catalog shared by all houses, loaded on first use"""
+    global _shared_manager
+    if _shared_manager is None:
+        _shared_manager = ObjectManager()
+    return _shared_manager
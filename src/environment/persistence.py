@@ -0,0 +1,134 @@
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict
+
+
+def atomic_write_json(path: str, data: dict, indent: int = 4):
+    """Write JSON to path via a temp file in the same directory plus rename"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        # Never leave half-written temp files behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class WriteBehindPersister:
+    """Coalesces state saves onto a background thread.
+
+    Callers mark the state dirty instead of saving it; the worker calls
+    save_fn at most once per interval, and once more on shutdown.
+    """
+
+    def __init__(self, save_fn: Callable[[], None], interval: float = 5.0,
+                 name: str = "WriteBehindPersister"):
+        self.save_fn = save_fn
+        self.interval = interval
+        self.name = name
+        self.logger = logging.getLogger(name)
+
+        self._dirty = False
+        self._dirty_lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+        # Save metrics
+        self.save_count = 0
+        self.error_count = 0
+        self.coalesced_count = 0
+        self.total_save_time = 0.0
+        self.last_save_time = 0.0
+        self.max_save_time = 0.0
+        self.last_saved_at = None
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self):
+        """Record that the state changed; the write happens later"""
+        with self._dirty_lock:
+            if self._dirty:
+                self.coalesced_count += 1
+            self._dirty = True
+
+    def start(self):
+        """Start the background writer thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name)
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the writer thread and flush any pending changes"""
+        if self._running:
+            self._running = False
+            self._wake.set()
+            if self._thread and self._thread is not threading.current_thread():
+                self._thread.join(timeout=self.interval + 5.0)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> bool:
+        """Save immediately if dirty. Returns True if a save happened."""
+        with self._save_lock:
+            with self._dirty_lock:
+                if not self._dirty:
+                    return False
+                self._dirty = False
+
+            start_time = time.perf_counter()
+            try:
+                self.save_fn()
+            except Exception as e:
+                # Keep the changes pending so the next flush retries them
+                with self._dirty_lock:
+                    self._dirty = True
+                self.error_count += 1
+                self.logger.error(f"Error saving state: {str(e)}")
+                return False
+
+            elapsed = time.perf_counter() - start_time
+            self.save_count += 1
+            self.total_save_time += elapsed
+            self.last_save_time = elapsed
+            self.max_save_time = max(self.max_save_time, elapsed)
+            self.last_saved_at = time.time()
+            return True
+
+    def get_metrics(self) -> Dict:
+        """Get save latency and coalescing metrics"""
+        return {
+            'dirty': self._dirty,
+            'interval': self.interval,
+            'save_count': self.save_count,
+            'error_count': self.error_count,
+            'coalesced_count': self.coalesced_count,
+            'last_save_ms': self.last_save_time * 1000,
+            'avg_save_ms': (self.total_save_time / self.save_count * 1000) if self.save_count else 0.0,
+            'max_save_ms': self.max_save_time * 1000,
+            'last_saved_at': self.last_saved_at
+        }
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
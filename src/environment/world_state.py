@@ -1,16 +1,47 @@
 from typing import Dict, Optional
 from src.utils.position import Position
+from src.environment.persistence import WriteBehindPersister, atomic_write_json
+from src.environment.world_store import JsonWorldStore, ReadOnlyWorldStore, SQLiteWorldStore
 import logging
 import json
 import os
 from datetime import datetime
+import threading
 import time
 
 class WorldState:
-    def __init__(self):
+    def __init__(self, save_interval: float = 5.0, store=None, read_only: bool = False):
         # Initialize logger
         self.logger = logging.getLogger("WorldState")
         
+        # Guards the state while a snapshot is taken for saving
+        self._lock = threading.RLock()
+        
+        # Storage backend; WORLD_STATE_STORE=sqlite selects the SQLite store
+        self.store = store or self._create_store()
+        if read_only:
+            # Mirrors of a world owned by the server must not save over it
+            self.store = ReadOnlyWorldStore(self.store)
+        self.read_only = read_only
+        self._dirty_characters = set()
+        
+        # Writes are coalesced and done off the caller's thread
+        self.persister = WriteBehindPersister(self.save_state, interval=save_interval,
+                                              name="WorldStatePersister")
+        
+        # Version stamps and cached fragments for serialization
+        self.version = 0
+        self.characters_version = 0
+        self._character_versions = {}
+        self._character_fragments = {}
+        self._fragments_version = -1
+        self._fragments_expire_at = float('inf')
+        self._characters_json = b'{}'
+        self._characters_generation = 0
+        self._serialized_json = None
+        self._restocked_at = datetime.now().isoformat()
+        self._change_listeners = []
+        
         # Initialize basic attributes
         self.character_positions = {}
         self.characters = {}
@@ -21,10 +52,9 @@ class WorldState:
         self.weather = "sunny"
         self.temperature = 22.0
         
-        # Create default state file if it doesn't exist
-        state_path = os.path.join(os.path.dirname(__file__), 'world_state.json')
-        if not os.path.exists(state_path):
-            self.logger.info("Creating default world state file")
+        # Create default state if the store is empty
+        if not self.store.exists():
+            self.logger.info("Creating default world state")
             self._create_default_state()
         
         # Load state after initializing all attributes
@@ -36,6 +66,22 @@ class WorldState:
             # Ensure we have at least empty character structures
             self.characters = {}
             self.character_positions = {}
+        
+        if not read_only:
+            self.persister.start()
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Lock held by whoever mutates or snapshots the world state"""
+        return self._lock
+
+    def _create_store(self):
+        """Create the storage backend selected by the environment"""
+        base_dir = os.path.dirname(__file__)
+        json_path = os.path.join(base_dir, 'world_state.json')
+        if os.getenv('WORLD_STATE_STORE', 'json').lower() == 'sqlite':
+            return SQLiteWorldStore(os.path.join(base_dir, 'world_state.db'), import_path=json_path)
+        return JsonWorldStore(json_path)
 
     def _create_default_state(self):
         """Create a default world state file if none exists"""
@@ -71,22 +117,17 @@ class WorldState:
             }
         }
         
-        state_path = os.path.join(os.path.dirname(__file__), 'world_state.json')
-        with open(state_path, 'w') as f:
-            json.dump(default_state, f, indent=4)
+        self.store.save(default_state)
         
         return default_state
 
     def load_state(self):
-        """Load world state from JSON file"""
-        state_path = os.path.join(os.path.dirname(__file__), 'world_state.json')
+        """Load world state from the store"""
         try:
-            if not os.path.exists(state_path):
-                self.logger.warning("World state file not found, creating default state")
+            state_data = self.store.load()
+            if state_data is None:
+                self.logger.warning("World state not found, creating default state")
                 state_data = self._create_default_state()
-            else:
-                with open(state_path, 'r') as f:
-                    state_data = json.load(f)
             
             # Load character positions
             for char_name, char_data in state_data.get('characters', {}).items():
@@ -107,6 +148,10 @@ class WorldState:
             self.weather = weather_data.get('current', 'sunny')
             self.temperature = weather_data.get('temperature', 22.0)
             
+            # Invalidate any cached serialization
+            self.version += 1
+            self.characters_version += 1
+            
             self.logger.info(f"Loaded world state: Day {self.current_day}, {self.current_season} {self.current_year}, "
                           f"Time {self.current_time:.1f}, Weather: {self.weather}")
             
@@ -124,8 +169,58 @@ class WorldState:
             self.temperature = 22.0
 
     def save_state(self):
-        """Save current world state to JSON"""
-        state_data = {
+        """Save current world state to the store"""
+        # Snapshot under the lock, write outside it
+        with self._lock:
+            dirty = self._dirty_characters
+            self._dirty_characters = set()
+            # Incremental stores only need the characters that changed
+            names = dirty if self.store.incremental else None
+            state_data = self._build_state_data(names)
+        
+        try:
+            self.store.save(state_data)
+        except Exception:
+            with self._lock:
+                self._dirty_characters |= dirty
+            raise
+        
+        logging.debug("Saved world state")
+
+    def export_json(self, path: str):
+        """Write the full world state as a JSON document"""
+        with self._lock:
+            state_data = self._build_state_data()
+        atomic_write_json(path, state_data)
+
+    def mark_dirty(self):
+        """Schedule a save of the world state"""
+        self.persister.mark_dirty()
+
+    def flush(self) -> bool:
+        """Write pending changes to disk now"""
+        return self.persister.flush()
+
+    def close(self):
+        """Stop background persistence and flush pending changes"""
+        self.persister.stop()
+        self.store.close()
+
+    def get_persistence_metrics(self) -> Dict:
+        """Get save latency metrics for the world state"""
+        return self.persister.get_metrics()
+
+    def _build_state_data(self, names=None) -> dict:
+        """Build the persisted representation of the world state.
+        
+        If names is given only those characters are included.
+        """
+        if names is None:
+            positions = self.character_positions
+        else:
+            positions = {name: self.character_positions[name]
+                         for name in names if name in self.character_positions}
+        return {
             "characters": {
                 name: {
                     "position": {"x": pos.x, "y": pos.y} if pos else {"x": 0, "y": 0},
@@ -135,7 +230,7 @@ class WorldState:
                     "online": self.characters.get(name, {}).get('online', False),
                     "last_update": self.characters.get(name, {}).get('last_update', 0)
                 }
-                for name, pos in self.character_positions.items()
+                for name, pos in positions.items()
             },
             "time": {
                 "current_time": self.current_time,
@@ -168,16 +263,11 @@ class WorldState:
                                    self.current_day - 1
             }
         }
-        
-        state_path = os.path.join(os.path.dirname(__file__), 'world_state.json')
-        with open(state_path, 'w') as f:
-            json.dump(state_data, f, indent=4)
-        
-        logging.debug("Saved world state")
 
     def update_time(self, delta_time: float):
         """Update game time (in hours)"""
         self.current_time = (self.current_time + delta_time) % 24
+        self.version += 1
         
         # Handle day changes
         if self.current_time < delta_time:  # We wrapped around to a new day
@@ -192,7 +282,7 @@ class WorldState:
                     self.current_year += 1
             
             # Save state at the start of each new day
-            self.save_state()
+            self.mark_dirty()
             
         logging.debug(f"Time updated to {self.current_time:.1f}, Day {self.current_day} of {self.current_season}")
 
@@ -207,27 +297,30 @@ class WorldState:
     def set_character_position(self, character_name: str, position: Position):
         """Set a character's position in the world"""
         try:
-            self.character_positions[character_name] = position
-            
-            # Ensure character exists in characters dict
-            if character_name not in self.characters:
-                self.characters[character_name] = {
-                    'name': character_name,
-                    'position': {'x': position.x, 'y': position.y},
-                    'online': True,
-                    'last_update': time.time(),
-                    'status': 'active'
-                }
-            else:
-                # Update existing character's position
-                self.characters[character_name]['position'] = {
-                    'x': position.x,
-                    'y': position.y
-                }
-                self.characters[character_name]['last_update'] = time.time()
+            with self._lock:
+                self.character_positions[character_name] = position
+                self._dirty_characters.add(character_name)
+                self.touch_character(character_name)
+                
+                # Ensure character exists in characters dict
+                if character_name not in self.characters:
+                    self.characters[character_name] = {
+                        'name': character_name,
+                        'position': {'x': position.x, 'y': position.y},
+                        'online': True,
+                        'last_update': time.time(),
+                        'status': 'active'
+                    }
+                else:
+                    # Update existing character's position
+                    self.characters[character_name]['position'] = {
+                        'x': position.x,
+                        'y': position.y
+                    }
+                    self.characters[character_name]['last_update'] = time.time()
             
             self.logger.debug(f"Set position for character {character_name} to {position}")
-            self.save_state()  # Save state after position update
+            self.mark_dirty()  # Schedule a save after position update
             
         except Exception as e:
             self.logger.error(f"Error setting character position: {str(e)}")
@@ -248,11 +341,14 @@ class WorldState:
 
     def set_character_online(self, character_name: str, is_online: bool = True):
         """Update a character's online status"""
-        if character_name not in self.characters:
-            self.characters[character_name] = {}
-        self.characters[character_name]['online'] = is_online
-        self.characters[character_name]['last_update'] = time.time()
-        self.save_state()
+        with self._lock:
+            if character_name not in self.characters:
+                self.characters[character_name] = {}
+            self.characters[character_name]['online'] = is_online
+            self.characters[character_name]['last_update'] = time.time()
+            self._dirty_characters.add(character_name)
+            self.touch_character(character_name)
+        self.mark_dirty()
 
     def is_character_online(self, character_name: str) -> bool:
         """Check if a character is currently online"""
@@ -263,58 +359,155 @@ class WorldState:
         return (char_data.get('online', False) and 
                 char_data.get('last_update', 0) > time.time() - 30)
 
-    def serialize(self) -> dict:
-        """Serialize world state"""
-        try:
+    def add_change_listener(self, listener):
+        """Register listener(kind, key), called whenever an entity changes"""
+        self._change_listeners.append(listener)
+
+    def _notify_change(self, kind: str, key):
+        for listener in self._change_listeners:
+            try:
+                listener(kind, key)
+            except Exception as e:
+                self.logger.error(f"Error in change listener: {str(e)}")
+
+    def touch_character(self, character_name: str):
+        """Mark a character's cached serialization as stale"""
+        with self._lock:
+            self.version += 1
+            self.characters_version += 1
+            self._character_versions[character_name] = self.version
+        self._notify_change('world_character', character_name)
+
+    def _encode_character(self, name: str, pos: Position, version: int, now: float) -> tuple:
+        """Build and encode one character's serialized entry"""
+        char_data = self.characters.get(name, {})
+        last_update = char_data.get('last_update', 0) or 0
+        online = char_data.get('online', False)
+        active = online and last_update > now - 30
+        data = {
+            'position': {'x': pos.x, 'y': pos.y} if pos else {'x': 0, 'y': 0},
+            'home_position': {'x': pos.x, 'y': pos.y} if pos else {'x': 0, 'y': 0},
+            'last_active': datetime.fromtimestamp(last_update or now).isoformat(),
+            'status': 'active' if active else 'offline',
+            'online': online,
+            'last_update': last_update
+        }
+        encoded = f"{json.dumps(name)}: {json.dumps(data)}".encode()
+        # An active entry goes stale when the character times out
+        expires_at = last_update + 30 if active else float('inf')
+        return (version, data, encoded, expires_at)
+
+    def _refresh_character_fragments(self, now: float):
+        """Re-encode only the character entries that changed or timed out"""
+        if (self.characters_version == self._fragments_version and
+                now < self._fragments_expire_at):
+            return
+        
+        changed = len(self._character_fragments) != len(self.character_positions)
+        fragments = {}
+        expire_at = float('inf')
+        for name, pos in self.character_positions.items():
+            version = self._character_versions.get(name, 0)
+            fragment = self._character_fragments.get(name)
+            if fragment is None or fragment[0] != version or now >= fragment[3]:
+                if fragment is not None and fragment[0] == version:
+                    # Only the online window lapsed; nobody touched it
+                    self._notify_change('world_character', name)
+                fragment = self._encode_character(name, pos, version, now)
+                changed = True
+            fragments[name] = fragment
+            expire_at = min(expire_at, fragment[3])
+        
+        self._character_fragments = fragments
+        self._fragments_version = self.characters_version
+        self._fragments_expire_at = expire_at
+        if changed:
+            self._characters_json = b'{' + b', '.join(f[2] for f in fragments.values()) + b'}'
+            self._characters_generation += 1
+
+    def _build_sections(self) -> dict:
+        """Build the serialized sections other than characters"""
+        last_saved = self.persister.last_saved_at
+        return {
+            'time': {
+                'current_time': self.current_time,
+                'day': self.current_day,
+                'season': self.current_season,
+                'year': self.current_year
+            },
+            'weather': {
+                'current': self.weather,
+                'temperature': self.temperature,
+                'conditions': []
+            },
+            'characters': None,
+            'buildings': {
+                'supermarket': {
+                    'position': {'x': 2, 'y': 0},
+                    'status': 'open' if self.is_daytime() else 'closed',
+                    'current_visitors': [],
+                    'inventory_last_restocked': self._restocked_at
+                }
+            },
+            'events': {
+                'scheduled': [],
+                'active': []
+            },
+            'metadata': {
+                'last_saved': datetime.fromtimestamp(last_saved).isoformat() if last_saved else None,
+                'version': '1.0',
+                'game_days_elapsed': (self.current_year - 1) * 4 * 30 + 
+                                   (["spring", "summer", "fall", "winter"].index(self.current_season)) * 30 +
+                                   self.current_day - 1
+            }
+        }
+
+    def serialize_json(self) -> bytes:
+        """Serialize world state to encoded JSON, reusing cached fragments"""
+        with self._lock:
+            self._refresh_character_fragments(time.time())
+            last_saved = self.persister.last_saved_at
+            key = (self.version, self._characters_generation, last_saved)
+            if self._serialized_json is not None and self._serialized_json[0] == key:
+                return self._serialized_json[1]
+            
+            parts = []
+            for section, value in self._build_sections().items():
+                encoded = self._characters_json if section == 'characters' else json.dumps(value).encode()
+                parts.append(json.dumps(section).encode() + b': ' + encoded)
+            encoded = b'{' + b', '.join(parts) + b'}'
+            self._serialized_json = (key, encoded)
+            return encoded
+
+    def serialize_delta(self, names) -> dict:
+        """Serialize time, weather and the given characters only"""
+        with self._lock:
+            self._refresh_character_fragments(time.time())
+            sections = self._build_sections()
             return {
-                'time': {
-                    'current_time': self.current_time,
-                    'day': self.current_day,
-                    'season': self.current_season,
-                    'year': self.current_year
-                },
-                'weather': {
-                    'current': self.weather,
-                    'temperature': self.temperature,
-                    'conditions': []
-                },
+                'time': sections['time'],
+                'weather': sections['weather'],
                 'characters': {
-                    name: {
-                        'position': {
-                            'x': pos.x,
-                            'y': pos.y
-                        } if pos else {'x': 0, 'y': 0},
-                        'home_position': {
-                            'x': pos.x,
-                            'y': pos.y
-                        } if pos else {'x': 0, 'y': 0},
-                        'last_active': datetime.now().isoformat(),
-                        'status': 'active' if self.is_character_online(name) else 'offline',
-                        'online': self.characters.get(name, {}).get('online', False),
-                        'last_update': self.characters.get(name, {}).get('last_update', 0)
-                    }
-                    for name, pos in self.character_positions.items()
-                },
-                'buildings': {
-                    'supermarket': {
-                        'position': {'x': 2, 'y': 0},
-                        'status': 'open' if self.is_daytime() else 'closed',
-                        'current_visitors': [],
-                        'inventory_last_restocked': datetime.now().isoformat()
-                    }
-                },
-                'events': {
-                    'scheduled': [],
-                    'active': []
-                },
-                'metadata': {
-                    'last_saved': datetime.now().isoformat(),
-                    'version': '1.0',
-                    'game_days_elapsed': (self.current_year - 1) * 4 * 30 + 
-                                       (["spring", "summer", "fall", "winter"].index(self.current_season)) * 30 +
-                                       self.current_day - 1
+                    name: self._character_fragments[name][1]
+                    for name in names if name in self._character_fragments
                 }
             }
+
+    def serialize(self) -> dict:
+        """Serialize world state.
+        
+        Character entries are cached and shared between calls, so callers
+        must treat the result as read-only.
+        """
+        try:
+            with self._lock:
+                self._refresh_character_fragments(time.time())
+                sections = self._build_sections()
+                sections['characters'] = {
+                    name: fragment[1]
+                    for name, fragment in self._character_fragments.items()
+                }
+                return sections
         except Exception as e:
             logging.error(f"Error serializing world state: {e}")
             return {
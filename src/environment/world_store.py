@@ -0,0 +1,280 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Optional
+from src.environment.persistence import atomic_write_json
+
+
+class JsonWorldStore:
+    """Stores the world state as a single JSON document"""
+
+    # Every save rewrites the whole document
+    incremental = False
+
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger("JsonWorldStore")
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> Optional[dict]:
+        """Load the state document, or None if there is none"""
+        if not self.exists():
+            return None
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def save(self, state_data: dict):
+        """Replace the stored document"""
+        atomic_write_json(self.path, state_data)
+
+    def close(self):
+        pass
+
+
+class ReadOnlyWorldStore:
+    """Loads from another store but never writes to it.
+
+    For processes that mirror the world while a server owns persistence.
+    """
+
+    incremental = False
+
+    def __init__(self, store):
+        self.store = store
+
+    def exists(self) -> bool:
+        return self.store.exists()
+
+    def load(self) -> Optional[dict]:
+        return self.store.load()
+
+    def save(self, state_data: dict):
+        pass
+
+    def close(self):
+        self.store.close()
+
+
+class SQLiteWorldStore:
+    """Stores the world state in SQLite with one row per character.
+
+    Saves receive a partial state document (only the characters that
+    changed) and upsert it in a single transaction. The database runs in
+    WAL mode so readers never block the writer and a crash can't leave a
+    torn file behind.
+    """
+
+    # Saves only need the characters that changed
+    incremental = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS characters (
+            name TEXT PRIMARY KEY,
+            online INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'offline',
+            last_update REAL NOT NULL DEFAULT 0,
+            last_active TEXT
+        );
+        CREATE TABLE IF NOT EXISTS positions (
+            name TEXT PRIMARY KEY,
+            x INTEGER NOT NULL,
+            y INTEGER NOT NULL,
+            home_x INTEGER NOT NULL,
+            home_y INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS time (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            game_time REAL NOT NULL,
+            day INTEGER NOT NULL,
+            season TEXT NOT NULL,
+            year INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS weather (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            current TEXT NOT NULL,
+            temperature REAL NOT NULL,
+            conditions TEXT NOT NULL DEFAULT '[]'
+        );
+        CREATE TABLE IF NOT EXISTS buildings (
+            name TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, import_path: Optional[str] = None):
+        self.path = path
+        self.logger = logging.getLogger("SQLiteWorldStore")
+        self._lock = threading.Lock()
+
+        # Saves come from the persister thread, loads from the caller's
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+        # Seed a fresh database from an existing JSON document
+        if import_path and not self.exists() and os.path.exists(import_path):
+            try:
+                with open(import_path, 'r') as f:
+                    self.save(json.load(f))
+                self.logger.info(f"Imported world state from {import_path}")
+            except Exception as e:
+                self.logger.error(f"Failed to import world state from {import_path}: {str(e)}")
+
+    def exists(self) -> bool:
+        with self._lock:
+            row = self.conn.execute("SELECT 1 FROM time WHERE id = 1").fetchone()
+        return row is not None
+
+    def load(self) -> Optional[dict]:
+        """Reassemble the state document from the tables"""
+        if not self.exists():
+            return None
+
+        with self._lock:
+            characters = {}
+            rows = self.conn.execute(
+                "SELECT c.name, c.online, c.status, c.last_update, c.last_active, "
+                "p.x, p.y, p.home_x, p.home_y "
+                "FROM characters c LEFT JOIN positions p ON p.name = c.name"
+            ).fetchall()
+            for name, online, status, last_update, last_active, x, y, home_x, home_y in rows:
+                characters[name] = {
+                    'position': {'x': x or 0, 'y': y or 0},
+                    'home_position': {'x': home_x or 0, 'y': home_y or 0},
+                    'last_active': last_active,
+                    'status': status,
+                    'online': bool(online),
+                    'last_update': last_update
+                }
+
+            current_time, day, season, year = self.conn.execute(
+                "SELECT game_time, day, season, year FROM time WHERE id = 1"
+            ).fetchone()
+
+            weather = self.conn.execute(
+                "SELECT current, temperature, conditions FROM weather WHERE id = 1"
+            ).fetchone() or ('sunny', 22.0, '[]')
+
+            buildings = {
+                name: json.loads(data)
+                for name, data in self.conn.execute("SELECT name, data FROM buildings")
+            }
+
+            metadata = {
+                key: json.loads(value)
+                for key, value in self.conn.execute("SELECT key, value FROM metadata")
+            }
+
+        return {
+            'characters': characters,
+            'time': {
+                'current_time': current_time,
+                'day': day,
+                'season': season,
+                'year': year
+            },
+            'weather': {
+                'current': weather[0],
+                'temperature': weather[1],
+                'conditions': json.loads(weather[2])
+            },
+            'buildings': buildings,
+            'events': metadata.pop('events', {'scheduled': [], 'active': []}),
+            'metadata': metadata
+        }
+
+    def save(self, state_data: dict):
+        """Upsert the sections present in state_data in one transaction"""
+        characters = state_data.get('characters', {})
+        character_rows = []
+        position_rows = []
+        for name, char_data in characters.items():
+            pos = char_data.get('position') or {}
+            home = char_data.get('home_position') or pos
+            character_rows.append((
+                name,
+                1 if char_data.get('online', False) else 0,
+                char_data.get('status', 'offline'),
+                char_data.get('last_update', 0) or 0,
+                char_data.get('last_active')
+            ))
+            position_rows.append((
+                name,
+                pos.get('x', 0), pos.get('y', 0),
+                home.get('x', 0), home.get('y', 0)
+            ))
+
+        with self._lock, self.conn:
+            if character_rows:
+                self.conn.executemany(
+                    "INSERT INTO characters (name, online, status, last_update, last_active) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET online = excluded.online, "
+                    "status = excluded.status, last_update = excluded.last_update, "
+                    "last_active = excluded.last_active",
+                    character_rows
+                )
+                self.conn.executemany(
+                    "INSERT INTO positions (name, x, y, home_x, home_y) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET x = excluded.x, y = excluded.y, "
+                    "home_x = excluded.home_x, home_y = excluded.home_y",
+                    position_rows
+                )
+
+            if 'time' in state_data:
+                time_data = state_data['time']
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO time (id, game_time, day, season, year) "
+                    "VALUES (1, ?, ?, ?, ?)",
+                    (time_data.get('current_time', 8.0), time_data.get('day', 1),
+                     time_data.get('season', 'spring'), time_data.get('year', 1))
+                )
+
+            if 'weather' in state_data:
+                weather_data = state_data['weather']
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO weather (id, current, temperature, conditions) "
+                    "VALUES (1, ?, ?, ?)",
+                    (weather_data.get('current', 'sunny'), weather_data.get('temperature', 22.0),
+                     json.dumps(weather_data.get('conditions', [])))
+                )
+
+            if 'buildings' in state_data:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO buildings (name, data) VALUES (?, ?)",
+                    [(name, json.dumps(data)) for name, data in state_data['buildings'].items()]
+                )
+
+            metadata = dict(state_data.get('metadata', {}))
+            if 'events' in state_data:
+                metadata['events'] = state_data['events']
+            if metadata:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                    [(key, json.dumps(value)) for key, value in metadata.items()]
+                )
+
+    def delete_character(self, name: str):
+        """Remove a character's rows"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM characters WHERE name = ?", (name,))
+            self.conn.execute("DELETE FROM positions WHERE name = ?", (name,))
+
+    def export_json(self, path: str):
+        """Write the full state as a JSON document"""
+        state_data = self.load()
+        if state_data is not None:
+            atomic_write_json(path, state_data)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
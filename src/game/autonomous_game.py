@@ -150,31 +150,19 @@ class AutonomousSimsGame:
         """Create a character instance with proper house assignment"""
         logger = logging.getLogger("CharacterCreation")
         
-        # Try to find an existing house for our character
-        character_house = None
-        
         # First check if character already has a house
-        for pos, plot in self.game_map.plots.items():
-            if plot.owner == name:
-                character_house = pos
-                logger.info(f"Found existing house for {name} at {pos}")
-                break
+        character_house = self.game_map.get_plot_by_owner(name)
+        if character_house:
+            logger.info(f"Found existing house for {name} at {character_house}")
         
         # If no house found, try to find an empty plot
         if not character_house:
-            empty_plots = self.game_map.get_empty_plots()
-            if empty_plots:
-                character_house = empty_plots[0]  # Take first empty plot
+            character_house = self.game_map.find_empty_plot()
+            if character_house:
                 logger.info(f"Assigning empty plot at {character_house} to {name}")
             else:
                 # Find a new position that doesn't overlap with existing plots
-                x, y = 0, 0
-                while Position(x, y) in self.game_map.plots:
-                    x += 1
-                    if x > 10:  # Wrap to next row after 10 columns
-                        x = 0
-                        y += 1
-                character_house = Position(x, y)
+                character_house = self.game_map.next_open_plot_position()
                 logger.info(f"Creating new plot at {character_house} for {name}")
         
         # Now ensure we have a house at this position
@@ -0,0 +1,350 @@
+# File: character_host.py
+"""
+Run many AutonomousCharacters in one process.
+
+Characters share one GameMap, one world server connection and the heavy
+models (Whisper, sentence transformers). A cooperative scheduler on one
+asyncio event loop decides who ticks next; the blocking part of a tick
+(LLM calls, embedding) runs on a small thread pool so slow characters
+don't hold up the others.
+
+Example config:
+
+    {
+        "world_server": {"host": "localhost", "port": 6000},
+        "max_concurrent": 4,
+        "ears": {"source": "tcp://0.0.0.0:7000", "backend": "faster-whisper"},
+        "voice": {"backend": "local"},
+        "characters": [
+            {"name": "Alice", "priority": 2.0, "interval": 2.0, "voice": "en+f3"},
+            {"name": "Bob", "listen": false}
+        ]
+    }
+"""
+import asyncio
+import heapq
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from src.character.autonomous_character import AutonomousCharacter
+from src.client.world_client import WorldClient
+from src.ears.whisper_manager import NullEars, WhisperManager
+from src.environment.map import GameMap
+from src.environment.world_state import WorldState
+from src.utils.models import Position
+from src.voice.speech import Speech
+from src.voice.voice_manager import VoiceManager
+
+
+@dataclass
+class CharacterSpec:
+    name: str
+    priority: float = 1.0   # Share of scheduler time relative to others
+    interval: float = 2.0   # Seconds between ticks
+    listen: bool = True     # Whether to listen to the environment
+    voice: Optional[str] = None  # Speech voice, or the backend's default
+
+
+def load_host_config(path: str) -> dict:
+    """Load a host config file listing the characters to run"""
+    with open(path, 'r') as f:
+        config = json.load(f)
+    config['characters'] = [
+        CharacterSpec(**spec) if isinstance(spec, dict) else CharacterSpec(spec)
+        for spec in config.get('characters', [])
+    ]
+    return config
+
+
+class _Entry:
+    __slots__ = ('spec', 'character', 'next_due', 'vruntime', 'running', 'ticks', 'busy_time',
+                 'window_busy')
+
+    def __init__(self, spec: CharacterSpec, character, vruntime: float):
+        self.spec = spec
+        self.character = character
+        self.next_due = 0.0
+        self.vruntime = vruntime
+        self.running = False
+        self.ticks = 0
+        self.busy_time = 0.0
+        self.window_busy = 0.0
+
+
+class CharacterScheduler:
+    """Picks which characters tick next.
+
+    A character becomes due every spec.interval seconds. When more are
+    due than there are free slots, the ones with the least virtual
+    runtime go first; virtual runtime grows by tick duration divided by
+    priority, so a priority 2 character gets twice the time of a
+    priority 1 character and nobody starves.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, _Entry] = {}
+        # Scheduling delay since the last take_window() call
+        self.window_lag = 0.0
+        self.window_starts = 0
+
+    def add(self, spec: CharacterSpec, character):
+        # Newcomers start level with the least served so they can't hog slots
+        vruntime = min((e.vruntime for e in self.entries.values()), default=0.0)
+        self.entries[spec.name] = _Entry(spec, character, vruntime)
+
+    def remove(self, name: str):
+        self.entries.pop(name, None)
+
+    def pick(self, now: float, slots: int) -> List[_Entry]:
+        """Up to slots due, idle entries, least served first"""
+        if slots <= 0:
+            return []
+        due = [e for e in self.entries.values() if not e.running and e.next_due <= now]
+        return heapq.nsmallest(slots, due, key=lambda e: (e.vruntime, e.next_due))
+
+    def started(self, entry: _Entry, now: float):
+        entry.running = True
+        if entry.next_due:
+            self.window_lag += now - entry.next_due
+            self.window_starts += 1
+
+    def finished(self, entry: _Entry, elapsed: float, now: float):
+        entry.running = False
+        entry.ticks += 1
+        entry.busy_time += elapsed
+        entry.window_busy += elapsed
+        entry.vruntime += elapsed / max(entry.spec.priority, 1e-6)
+        entry.next_due = now + entry.spec.interval
+
+    def next_wakeup(self, now: float) -> float:
+        """Seconds until the next idle entry is due"""
+        waiting = [e.next_due for e in self.entries.values() if not e.running]
+        if not waiting:
+            return 1.0
+        return max(0.0, min(waiting) - now)
+
+    def take_window(self) -> dict:
+        """Busy time per character and average lag since the last call"""
+        window = {
+            'busy': {name: entry.window_busy for name, entry in self.entries.items()},
+            'lag': self.window_lag / self.window_starts if self.window_starts else 0.0
+        }
+        for entry in self.entries.values():
+            entry.window_busy = 0.0
+        self.window_lag = 0.0
+        self.window_starts = 0
+        return window
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {
+            name: {
+                'ticks': entry.ticks,
+                'busy_time': entry.busy_time,
+                'vruntime': entry.vruntime
+            }
+            for name, entry in self.entries.items()
+        }
+
+
+def claim_plot(name: str, game_map: GameMap, position: Optional[Position] = None) -> Position:
+    """Assign name a plot: the given one, the one they own or a free one"""
+    if position is None:
+        position = game_map.get_plot_by_owner(name)
+    if position is None:
+        position = game_map.find_empty_plot() or game_map.next_open_plot_position()
+
+    if not game_map.assign_house_to_character(name, position):
+        raise Exception(f"Failed to create or assign house for {name}")
+    return position
+
+
+def create_character(name: str, game_map: GameMap, ears=None, voice_manager=None,
+                     house_position: Optional[Position] = None) -> AutonomousCharacter:
+    """Create a character in its own house on the shared map.
+
+    house_position keeps a character on a plot picked elsewhere, e.g. by
+    the host it moved from.
+    """
+    logger = logging.getLogger("CharacterCreation")
+
+    character_house = claim_plot(name, game_map, house_position)
+    house = game_map.get_building(character_house)
+
+    character = AutonomousCharacter(name, house, game_map, ears=ears, voice_manager=voice_manager)
+    game_map.world_state.set_character_position(name, character_house)
+    house.authorize_user(name)
+
+    logger.info(f"Created {name} in house at {character_house}")
+    return character
+
+
+class CharacterHost:
+    """Runs the characters from a host config on one event loop"""
+
+    def __init__(self, config: dict, game_map: Optional[GameMap] = None):
+        self.config = config
+        self.logger = logging.getLogger("CharacterHost")
+        if game_map is None:
+            # With a world server, the server owns the world file and we only mirror it
+            game_map = GameMap(world_state=WorldState(read_only=bool(config.get('world_server'))))
+        self.game_map = game_map
+        self.scheduler = CharacterScheduler()
+        self.max_concurrent = config.get('max_concurrent', 4)
+        # Seconds between world updates, the single-character loop's pace
+        self.world_update_interval = config.get('world_update_interval', 2.0)
+        self.world_client = None
+        self.running = False
+        self._loop = None
+        self._wakeup = None
+        self._window_started = time.time()
+        self.ready = threading.Event()
+
+        # One microphone and one speech engine for the whole process; each
+        # character gets its own VoiceManager around the shared engine
+        self.ears = None
+        self.speech_engine = None
+        self._null_ears = NullEars()
+
+    def start(self):
+        """Run until stop() is called"""
+        asyncio.run(self.serve())
+
+    def stop(self):
+        self.running = False
+        if self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def call_threadsafe(self, fn, *args, timeout: Optional[float] = None):
+        """Run fn(*args) on the host's event loop from another thread"""
+        async def run():
+            return fn(*args)
+        return asyncio.run_coroutine_threadsafe(run(), self._loop).result(timeout)
+
+    def get_load(self) -> dict:
+        """Utilization and scheduling lag since the last call"""
+        now = time.time()
+        elapsed = max(now - self._window_started, 1e-6)
+        self._window_started = now
+        window = self.scheduler.take_window()
+        capacity = elapsed * self.max_concurrent
+        return {
+            'characters': len(self.scheduler.entries),
+            'utilization': sum(window['busy'].values()) / capacity,
+            'lag': window['lag'],
+            'character_utilization': {name: busy / capacity for name, busy in window['busy'].items()}
+        }
+
+    def add_character(self, spec: CharacterSpec, state: Optional[dict] = None,
+                      house: Optional[Position] = None) -> AutonomousCharacter:
+        """Start hosting a character.
+
+        state comes from remove_character on another host and keeps the
+        character in the house it had there; house places a new character
+        on a plot picked by the caller.
+        """
+        if state and state.get('home_position'):
+            house = Position(state['home_position']['x'], state['home_position']['y'])
+        if self.ears is None and spec.listen:
+            self.ears = WhisperManager(**self.config.get('ears', {}))
+        if self.speech_engine is None:
+            self.speech_engine = Speech(**self.config.get('voice', {}))
+
+        ears = self.ears if spec.listen else self._null_ears
+        voice_manager = VoiceManager(speech_engine=self.speech_engine)
+        character = create_character(spec.name, self.game_map, ears, voice_manager, house)
+        character.listen_enabled = spec.listen
+        character.voice = spec.voice
+        if state:
+            character.restore(state)
+        if self.world_client and not self.world_client.register_character(character):
+            self.logger.error(f"Failed to register {spec.name} with world")
+        self.scheduler.add(spec, character)
+        return character
+
+    def remove_character(self, name: str, offline: bool = True) -> Optional[dict]:
+        """Stop hosting a character and return its state.
+        
+        Returns None if the character isn't here or is mid-tick.
+        """
+        entry = self.scheduler.entries.get(name)
+        if entry is None or entry.running:
+            return None
+        self.scheduler.remove(name)
+        if offline:
+            entry.character.online = False
+            if self.world_client:
+                self.world_client.unregister_character(name)
+        return entry.character.serialize()
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.running = True
+
+        server = self.config.get('world_server')
+        if server:
+            self.world_client = WorldClient(server.get('host', 'localhost'), server.get('port', 6000))
+            if not self.world_client.connect():
+                self.logger.error("Failed to connect to world server")
+                self.world_client = None
+
+        for spec in self.config.get('characters', []):
+            self.add_character(spec)
+        self.logger.info(f"Hosting {len(self.scheduler.entries)} characters")
+        self.ready.set()
+
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="CharacterTick")
+        tasks = set()
+        last_world_update = time.time()
+        try:
+            while self.running:
+                now = time.time()
+
+                # The shared map is advanced once for everyone, at world pace
+                if now - last_world_update >= self.world_update_interval:
+                    self.game_map.update((now - last_world_update) / 3600.0)
+                    last_world_update = now
+
+                for entry in self.scheduler.pick(now, self.max_concurrent - len(tasks)):
+                    self.scheduler.started(entry, now)
+                    task = asyncio.create_task(self._tick(pool, entry))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+                # Sleep until someone is due, a tick finishes or we're stopped
+                timeout = 1.0 if len(tasks) >= self.max_concurrent else self.scheduler.next_wakeup(now)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(timeout, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.running = False
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            pool.shutdown(wait=True)
+            for name in list(self.scheduler.entries):
+                self.remove_character(name)
+            if self.world_client:
+                self.world_client.disconnect()
+            self.logger.info("Character host stopped")
+
+    async def _tick(self, pool: ThreadPoolExecutor, entry: _Entry):
+        character = entry.character
+        started = time.time()
+        try:
+            result = await self._loop.run_in_executor(pool, character.update, entry.spec.interval)
+            self.logger.info(f"[{character.name}] Thought: {character.thought}")
+            self.logger.info(f"[{character.name}] Action: {result}")
+            if self.world_client:
+                self.world_client.update_character_state(character)
+        except Exception as e:
+            self.logger.error(f"Error ticking {character.name}: {str(e)}", exc_info=True)
+        finally:
+            now = time.time()
+            self.scheduler.finished(entry, now - started, now)
+            self._wakeup.set()
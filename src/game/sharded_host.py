@@ -0,0 +1,278 @@
+# File: sharded_host.py
+"""
+Spread hosted characters over several worker processes.
+
+Each worker runs a CharacterHost for its share of the characters, with a
+read-only mirror of the map, and talks to the world server over the
+framed protocol like any other client. Characters are placed on a
+consistent hash ring by name, so adding a shard only moves the
+characters that hash to it. When a shard falls behind, characters are
+migrated to the least loaded shard with their state and keep their
+house. Plots for new characters are handed out by the parent, so two
+shards never give away the same free plot.
+
+Where fork is available the workers are forked after the models are
+loaded, so every worker shares the parent's read-only model weights.
+"""
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from src.game.character_host import CharacterHost, CharacterSpec, claim_plot
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to nodes"""
+
+    def __init__(self, nodes=(), replicas: int = 64):
+        self.replicas = replicas
+        self._hashes: List[int] = []
+        self._nodes: Dict[int, object] = {}
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+    def add(self, node):
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            bisect.insort(self._hashes, point)
+            self._nodes[point] = node
+
+    def remove(self, node):
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            index = bisect.bisect_left(self._hashes, point)
+            if index < len(self._hashes) and self._hashes[index] == point:
+                del self._hashes[index]
+                del self._nodes[point]
+
+    def get(self, key: str):
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._nodes[self._hashes[index]]
+
+
+def preload_models(config: dict):
+    """Load the shared models before forking workers"""
+    from src.memory.knowledge_system import get_encoder
+    from src.ears.asr import preload_asr_backend
+    get_encoder()
+    # Same options CharacterHost gives WhisperManager, and only if anyone listens
+    if any(spec.listen for spec in config.get('characters', [])):
+        preload_asr_backend(**config.get('ears', {}))
+
+
+# Commands a worker accepts from the parent
+_WORKER_COMMANDS = ('add_character', 'remove_character', 'get_load')
+
+
+def _run_shard(shard_id: int, config: dict, conn):
+    """Worker process entry point"""
+    from src.environment.map import GameMap
+    from src.environment.world_state import WorldState
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(f"Shard{shard_id}")
+
+    # The world server owns persistence; the local map is only a mirror
+    game_map = GameMap(world_state=WorldState(read_only=True))
+    host = CharacterHost(dict(config, characters=[]), game_map)
+
+    def serve_control():
+        host.ready.wait()
+        while True:
+            try:
+                command, args = conn.recv()
+            except (EOFError, OSError):
+                host.stop()
+                return
+            if command == 'stop':
+                host.stop()
+                return
+            try:
+                if command not in _WORKER_COMMANDS:
+                    raise ValueError(f"Unknown shard command: {command}")
+                conn.send(('ok', host.call_threadsafe(getattr(host, command), *args)))
+            except Exception as e:
+                logger.error(f"Error handling {command}: {str(e)}")
+                conn.send(('error', str(e)))
+
+    threading.Thread(target=serve_control, name="ShardControl", daemon=True).start()
+    try:
+        host.start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        game_map.world_state.close()
+
+
+class _Shard:
+    def __init__(self, shard_id: int, process, conn):
+        self.id = shard_id
+        self.process = process
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.load = {}
+
+    def request(self, command: str, *args):
+        with self.lock:
+            self.conn.send((command, args))
+            status, result = self.conn.recv()
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+
+class ShardedHost:
+    """Runs the characters from a host config across worker processes.
+
+    Extra config keys: shards (worker count, defaults to the CPU count),
+    rebalance_interval (seconds), max_lag (seconds a character may wait
+    past its due time before its shard counts as overloaded) and
+    max_utilization.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.logger = logging.getLogger("ShardedHost")
+        self.num_shards = config.get('shards') or os.cpu_count() or 1
+        self.rebalance_interval = config.get('rebalance_interval', 30.0)
+        self.max_lag = config.get('max_lag', 1.0)
+        self.max_utilization = config.get('max_utilization', 0.9)
+        self.shards: Dict[int, _Shard] = {}
+        self.ring = HashRing()
+        self.specs: Dict[str, CharacterSpec] = {}
+        self.placement: Dict[str, int] = {}  # Where each character runs now
+        self.migrations = 0
+        self.game_map = None  # Mirror used to hand out plots, opened after forking
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the workers and rebalance until stop() is called"""
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        if context.get_start_method() == 'fork' and self.config.get('preload_models', True):
+            preload_models(self.config)
+
+        for shard_id in range(self.num_shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_run_shard,
+                args=(shard_id, dict(self.config, characters=[]), child_conn),
+                name=f"CharacterShard-{shard_id}",
+                daemon=True
+            )
+            process.start()
+            self.shards[shard_id] = _Shard(shard_id, process, parent_conn)
+            self.ring.add(shard_id)
+
+        from src.environment.map import GameMap
+        from src.environment.world_state import WorldState
+        self.game_map = GameMap(world_state=WorldState(read_only=True))
+        for spec in self.config.get('characters', []):
+            self.add_character(spec)
+        self.logger.info(f"Hosting {len(self.specs)} characters on {self.num_shards} shards")
+
+        try:
+            while not self._stop.wait(self.rebalance_interval):
+                try:
+                    self.rebalance()
+                except Exception as e:
+                    self.logger.error(f"Error rebalancing shards: {str(e)}")
+        finally:
+            self._shutdown()
+
+    def stop(self):
+        self._stop.set()
+
+    def _shutdown(self):
+        for shard in self.shards.values():
+            try:
+                with shard.lock:
+                    shard.conn.send(('stop', ()))
+            except (BrokenPipeError, OSError):
+                pass
+        for shard in self.shards.values():
+            shard.process.join(timeout=30.0)
+            if shard.process.is_alive():
+                shard.process.terminate()
+        if self.game_map:
+            self.game_map.world_state.close()
+        self.logger.info("Sharded host stopped")
+
+    def shard_for(self, name: str) -> int:
+        """The shard a character runs on, or would be placed on"""
+        if name in self.placement:
+            return self.placement[name]
+        return self.ring.get(name)
+
+    def add_character(self, spec: CharacterSpec, state: Optional[dict] = None):
+        shard_id = self.shard_for(spec.name)
+        house = None
+        if not state:
+            # Plots are handed out here so two shards never pick the same free one
+            house = claim_plot(spec.name, self.game_map)
+        self.shards[shard_id].request('add_character', spec, state, house)
+        self.specs[spec.name] = spec
+        self.placement[spec.name] = shard_id
+
+    def remove_character(self, name: str) -> Optional[dict]:
+        shard_id = self.placement.get(name)
+        if shard_id is None:
+            return None
+        state = self.shards[shard_id].request('remove_character', name)
+        if state is not None:
+            self.specs.pop(name, None)
+            self.placement.pop(name, None)
+        return state
+
+    def migrate(self, name: str, target: int) -> bool:
+        """Move a character to another shard, keeping its state"""
+        source = self.placement.get(name)
+        if source is None or source == target:
+            return False
+        state = self.shards[source].request('remove_character', name, False)
+        if state is None:
+            return False  # Mid-tick; try again next round
+        try:
+            self.shards[target].request('add_character', self.specs[name], state)
+        except Exception as e:
+            self.logger.error(f"Failed to move {name} to shard {target}: {str(e)}")
+            # Put it back where it was rather than lose it
+            self.shards[source].request('add_character', self.specs[name], state)
+            return False
+        self.placement[name] = target
+        self.migrations += 1
+        self.logger.info(f"Migrated {name} from shard {source} to shard {target}")
+        return True
+
+    def _overloaded(self, load: dict) -> bool:
+        return load['lag'] > self.max_lag or load['utilization'] > self.max_utilization
+
+    def rebalance(self) -> Optional[str]:
+        """Move one character off the busiest shard if it is overloaded"""
+        for shard in self.shards.values():
+            shard.load = shard.request('get_load')
+
+        busiest = max(self.shards.values(), key=lambda s: (s.load['lag'], s.load['utilization']))
+        idlest = min(self.shards.values(), key=lambda s: (s.load['lag'], s.load['utilization']))
+        if busiest is idlest or not self._overloaded(busiest.load) or self._overloaded(idlest.load):
+            return None
+
+        # Move the heaviest character that doesn't just shift the overload
+        source_load = busiest.load['utilization']
+        target_load = idlest.load['utilization']
+        candidates = sorted(busiest.load['character_utilization'].items(), key=lambda item: -item[1])
+        for name, load in candidates:
+            if target_load + load < source_load - load or busiest.load['lag'] > self.max_lag:
+                if self.migrate(name, idlest.id):
+                    return name
+        return None
@@ -123,6 +123,7 @@ Current situation:
 Location: {context['current_room']}
 Available objects: {', '.join(context['available_objects'])}
 Available directions: {', '.join(context['available_directions'])}
+Rooms you can go to: {', '.join(context.get('destinations', []))}
 
 Needs Status:
 {self._format_needs_status(context['needs'], context['need_status'])}
@@ -140,22 +141,30 @@ Important memories:
 
 Emotional state:
 {self._format_emotional_state(context['emotional_state'])}
-
+{self._format_hearing(context)}
 Make a decision about what to do next. Consider:
 1. Most urgent needs and their status
 2. Available objects and their effects
 3. Previous actions and memories
-4. Current location and available movements
+4. Current location and available movements (go_to walks to any room or object at once)
 5. Emotional state and context
 
 Respond with JSON in this format:
 {{
-    "action": "move|use|idle",
-    "target": "<direction_name|object_name|null>",
+    "action": "move|go_to|use|idle",
+    "target": "<direction_name|room_or_object_name|object_name|null>",
     "thought": "<detailed_reasoning_for_decision>"
 }}
 """
 
+    def _format_hearing(self, context: Dict) -> str:
+        lines = []
+        if context.get('environmental_audio'):
+            lines.append(f"You heard: \"{context['environmental_audio']}\"")
+        if context.get('hearing_now'):
+            lines.append(f"Someone is still speaking: \"{context['hearing_now']}...\"")
+        return "\n" + "\n".join(lines) + "\n" if lines else ""
+
     def _format_needs_status(self, needs: Dict, status: Dict) -> str:
         return "\n".join([f"- {need}: {value:.1f} ({status[need]})" for need, value in needs.items()])
 
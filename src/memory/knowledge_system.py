@@ -7,11 +7,22 @@ import json
 import time
 from datetime import datetime
 import os
+import threading
+
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+def get_encoder(model_name: str = 'all-MiniLM-L6-v2') -> SentenceTransformer:
+    """Load a sentence transformer once per process and share it"""
+    with _encoders_lock:
+        if model_name not in _encoders:
+            _encoders[model_name] = SentenceTransformer(model_name)
+        return _encoders[model_name]
 
 class KnowledgeSystem:
     def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
-        # Initialize the sentence transformer model
-        self.encoder = SentenceTransformer(model_name)
+        # Initialize the sentence transformer model, shared by every instance
+        self.encoder = get_encoder(model_name)
         self.vector_dim = 384  # Dimension of embeddings from the model
 
         # Initialize FAISS indices for different memory types
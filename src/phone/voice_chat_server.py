@@ -1,6 +1,7 @@
-from flask import Flask, request, jsonify, send_from_directory, make_response
+from flask import Flask, request, jsonify, send_from_directory, make_response, url_for, abort
 from flask_cors import CORS
 import logging
+import re
 from pathlib import Path
 from src.phone.phone_system import PhoneSystem
 from src.utils.models import Position
@@ -34,6 +35,10 @@ class VoiceChatServer:
 
 voice_server = VoiceChatServer()
 
+# Speech files are named by a hash of their content, so they never change
+AUDIO_FILE_NAME = re.compile(r'[0-9a-f]{64}\.(mp3|wav)')
+AUDIO_MAX_AGE = 365 * 24 * 3600
+
 @app.route('/')
 def serve_index():
     """Serve the main phone interface"""
@@ -64,14 +69,11 @@ def receive_text_message():
         try:
             audio_path = voice_server.phone_system.speech.complete_task(response)
             
-            # Read the audio file
-            with open(str(audio_path), 'rb') as audio_file:
-                audio_data = audio_file.read()
-                
+            # The client fetches the audio itself, as a cacheable file
             return jsonify({
                 "success": True,
                 "text_response": response,
-                "audio_data": list(audio_data)  # Convert bytes to list for JSON
+                "audio_url": url_for('serve_audio', name=audio_path.name)
             })
             
         except Exception as e:
@@ -80,7 +82,7 @@ def receive_text_message():
             return jsonify({
                 "success": True,
                 "text_response": response,
-                "audio_data": None
+                "audio_url": None
             })
             
     except Exception as e:
@@ -90,10 +92,23 @@ def receive_text_message():
             "error": str(e)
         })
 
+@app.route('/audio/<name>')
+def serve_audio(name):
+    """Serve a synthesized reply with range requests and long-lived caching"""
+    if not voice_server.phone_system or not AUDIO_FILE_NAME.fullmatch(name):
+        abort(404)
+    response = send_from_directory(
+        voice_server.phone_system.speech.speech_dir,
+        name,
+        conditional=True  # ETag, If-None-Match and Range support
+    )
+    response.headers['Cache-Control'] = f'public, max-age={AUDIO_MAX_AGE}, immutable'
+    return response
+
 @app.after_request
 def add_header(response):
     """Add headers to prevent caching for API endpoints"""
-    if request.endpoint != 'serve_index':  # Don't add for static files
+    if request.endpoint not in ('serve_index', 'serve_audio'):  # Don't add for static files
         response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '0'
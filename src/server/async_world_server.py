@@ -0,0 +1,238 @@
+import asyncio
+import logging
+from src.server.world_server import WorldServer
+from src.utils.protocol import (
+    CODEC_JSON, HEADER, MAGIC, PROTOCOL_VERSION, FrameDecoder, MessageError, ProtocolError
+)
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+class WorldActor:
+    """Applies every world mutation from a single task.
+
+    Connection handlers submit calls instead of touching the game map
+    themselves, so mutations never interleave. The bounded queue pushes
+    back on handlers when the world falls behind.
+    """
+
+    def __init__(self, max_pending: int = 10000):
+        self.max_pending = max_pending
+        self.queue = None
+        self._task = None
+        self.logger = logging.getLogger("WorldActor")
+
+    def start(self):
+        self.queue = asyncio.Queue(self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def call(self, fn, *args):
+        """Run fn(*args) on the actor and return its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((fn, args, future))
+        return await future
+
+    async def stop(self):
+        """Finish queued calls, then stop"""
+        if self._task:
+            await self.queue.put((None, None, None))
+            await self._task
+            self._task = None
+
+    async def _run(self):
+        while True:
+            fn, args, future = await self.queue.get()
+            if fn is None:
+                return
+            try:
+                result = fn(*args)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+
+class _Connection:
+    """Per-connection state with a bounded outgoing queue"""
+
+    def __init__(self, address, max_pending: int):
+        self.address = address
+        self.outbox = asyncio.Queue(max_pending)
+
+
+class AsyncSubscriber:
+    """Subscription pushes for an asyncio connection.
+
+    Pushes never wait: if the client isn't reading and its outbox is full,
+    the push is dropped and the client gets a keyframe once there's room.
+    """
+
+    def __init__(self, connection: _Connection):
+        self.key = id(connection)
+        self.address = connection.address
+        self.connection = connection
+        self.needs_keyframe = True
+
+    def send(self, body: bytes) -> bool:
+        try:
+            self.connection.outbox.put_nowait(
+                HEADER.pack(MAGIC, PROTOCOL_VERSION, CODEC_JSON, len(body)) + body
+            )
+        except asyncio.QueueFull:
+            self.needs_keyframe = True
+        return True
+
+    def close(self):
+        pass  # The connection's writer owns the outbox
+
+
+class AsyncWorldServer(WorldServer):
+    """World server running every connection on one asyncio event loop.
+
+    Speaks the framed protocol only. Uses uvloop when it is installed.
+    """
+
+    def __init__(self, game_map, host="0.0.0.0", port=6000, max_pending_per_connection: int = 256):
+        super().__init__(game_map, host, port)
+        self.logger = logging.getLogger("AsyncWorldServer")
+        self.max_pending_per_connection = max_pending_per_connection
+        self.actor = WorldActor()
+        self.connections = {}
+        self._loop = None
+        self._stopped = None
+
+    def start(self):
+        """Run the server until stop() is called"""
+        if uvloop is not None:
+            uvloop.install()
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self.actor.start()
+
+        server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, backlog=1024
+        )
+        self.running = True
+        publisher = asyncio.create_task(self._publish_loop())
+        self.logger.info(f"World server started on {self.host}:{self.port}")
+
+        try:
+            await self._stopped.wait()
+        finally:
+            # Stop accepting, flush and close clients, then drain the actor
+            self.running = False
+            server.close()
+            publisher.cancel()
+            handlers = list(self.connections.values())
+            for handler in handlers:
+                handler.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await server.wait_closed()
+            await self.actor.stop()
+            self.logger.info("World server stopped")
+
+    def stop(self):
+        self.running = False
+        if self._loop and self._stopped:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def run_in_world(self, fn, *args):
+        """Run fn on the world actor from another thread and wait for it"""
+        if not self.running or self._loop is None:
+            return fn(*args)
+        future = asyncio.run_coroutine_threadsafe(self.actor.call(fn, *args), self._loop)
+        return future.result(timeout=10.0)
+
+    async def _publish_loop(self):
+        while True:
+            await asyncio.sleep(self.subscriptions.interval)
+            try:
+                await self.actor.call(self.subscriptions.publish)
+            except Exception as e:
+                self.logger.error(f"Error publishing world updates: {str(e)}")
+
+    async def _handle_connection(self, reader, writer):
+        address = writer.get_extra_info('peername')
+        connection = _Connection(address, self.max_pending_per_connection)
+        self.connections[writer] = asyncio.current_task()
+        writer_task = asyncio.create_task(self._write_loop(connection, writer))
+        decoder = FrameDecoder()
+        self.logger.info(f"New client connected from {address}")
+
+        try:
+            while self.running:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                # Requests are answered in order; waiting on the outbox
+                # stops us reading from clients that don't read replies
+                while True:
+                    try:
+                        for codec, message in decoder.feed(data):
+                            response = await self.actor.call(self._dispatch_async, connection, message)
+                            await connection.outbox.put(self._encode_frame(response, codec, message.get('id')))
+                        break
+                    except MessageError as e:
+                        # Framing is intact: answer this frame and carry on with the rest
+                        self.logger.error(f"Invalid message from {address}: {e}")
+                        await connection.outbox.put(self._encode_frame({
+                            'status': 'error',
+                            'message': str(e)
+                        }, e.codec, None))
+                        data = b''
+        except ProtocolError as e:
+            self.logger.error(f"Protocol error from {address}: {e}")
+            await connection.outbox.put(self._encode_frame({
+                'status': 'error',
+                'message': str(e)
+            }, CODEC_JSON, None))
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            self.logger.error(f"Client handler error for {address}: {str(e)}")
+        finally:
+            self.subscriptions.unsubscribe(connection)
+            # Give queued replies a chance to go out before closing
+            try:
+                connection.outbox.put_nowait(None)
+                await asyncio.wait_for(writer_task, timeout=5.0)
+            except (asyncio.QueueFull, asyncio.TimeoutError, asyncio.CancelledError):
+                writer_task.cancel()
+            self.connections.pop(writer, None)
+            writer.close()
+            self.logger.info(f"Client disconnected: {address}")
+
+    async def _write_loop(self, connection: _Connection, writer):
+        try:
+            while True:
+                data = await connection.outbox.get()
+                if data is None:
+                    return
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+
+    def _dispatch_async(self, connection: _Connection, message):
+        """Route a message to its handler; runs on the world actor"""
+        command = message.get('command')
+        if command == 'hello':
+            return self.process_hello(message)
+        if command == 'subscribe':
+            return self.subscriptions.add_subscriber(AsyncSubscriber(connection))
+        if command == 'resync':
+            if self.subscriptions.request_resync(connection):
+                return {'status': 'success', 'type': 'resync', 'seq': self.subscriptions.seq}
+            return {'status': 'error', 'message': 'Not subscribed'}
+        if command == 'unsubscribe':
+            self.subscriptions.unsubscribe(connection)
+            return {'status': 'success', 'type': 'unsubscribed'}
+        return self.process_message(message)
@@ -0,0 +1,229 @@
+import json
+import logging
+import queue
+import threading
+from typing import Dict
+from src.utils.protocol import CODEC_JSON, HEADER, MAGIC, PROTOCOL_VERSION
+
+
+class Subscriber:
+    """A connection receiving world state pushes.
+
+    Pushes go into a bounded outbox that the subscriber's own thread
+    writes out, so a client that stops reading only holds up itself. If
+    the outbox is full the push is dropped and the client gets a
+    keyframe once there's room.
+    """
+
+    def __init__(self, client_socket, send_lock: threading.Lock, address, framed: bool = False,
+                 max_pending: int = 64):
+        self.key = id(client_socket)
+        self.socket = client_socket
+        self.send_lock = send_lock
+        self.address = address
+        self.framed = framed
+        self.needs_keyframe = True
+        self.failed = False
+        self.outbox = queue.Queue(max_pending)
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_loop, name=f"Subscriber-{address}")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def send(self, body: bytes) -> bool:
+        """Queue an encoded JSON message; False once the connection has failed"""
+        if self.failed:
+            return False
+        try:
+            self.outbox.put_nowait(body)
+        except queue.Full:
+            self.needs_keyframe = True
+        return True
+
+    def close(self):
+        self._closed = True
+        try:
+            self.outbox.put_nowait(None)
+        except queue.Full:
+            pass  # The writer sees _closed after its current send
+
+    def _write_loop(self):
+        while not self._closed:
+            body = self.outbox.get()
+            if body is None:
+                return
+            try:
+                with self.send_lock:
+                    if self.framed:
+                        # Header and shared body go out separately to avoid a copy
+                        self.socket.sendall(HEADER.pack(MAGIC, PROTOCOL_VERSION, CODEC_JSON, len(body)))
+                        self.socket.sendall(body)
+                    else:
+                        self.socket.sendall(body + b'\n')
+            except Exception:
+                self.failed = True
+                return
+
+
+class SubscriptionManager:
+    """Pushes world state changes to subscribed clients.
+
+    Every tick the changes collected from the game map are published as one
+    sequence-numbered delta, encoded once and sent to all subscribers. A
+    full keyframe is sent on subscribe, every keyframe_interval deltas and
+    whenever a client asks to resync after noticing a sequence gap.
+    Pushes are frames on framed connections and newline-delimited JSON on
+    legacy ones.
+    """
+
+    def __init__(self, game_map, interval: float = 0.5, keyframe_interval: int = 60):
+        self.game_map = game_map
+        # Replaced by servers that confine world access to one thread
+        self.run_in_world = lambda fn, *args: fn(*args)
+        self.interval = interval
+        self.keyframe_interval = keyframe_interval
+        self.logger = logging.getLogger("SubscriptionManager")
+
+        self.seq = 0
+        self.subscribers: Dict[int, Subscriber] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._deltas_since_keyframe = 0
+        self._last_time = None
+
+        # Entities changed since the last published delta
+        self._changed_characters = set()
+        self._changed_plots = set()
+        self._changed_world_characters = set()
+        self.game_map.add_change_listener(self._on_change)
+
+    def _on_change(self, kind: str, key):
+        with self._lock:
+            if kind == 'character':
+                self._changed_characters.add(key)
+            elif kind == 'plot':
+                self._changed_plots.add(key)
+            elif kind == 'world_character':
+                self._changed_world_characters.add(key)
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="SubscriptionManager")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1.0)
+            self._thread = None
+
+    def subscribe(self, client_socket, send_lock: threading.Lock, address, framed: bool = False) -> dict:
+        """Subscribe a connection; it gets a keyframe on the next tick"""
+        return self.add_subscriber(Subscriber(client_socket, send_lock, address, framed))
+
+    def add_subscriber(self, subscriber) -> dict:
+        """Add any object with key, address, needs_keyframe, send(body) and close()"""
+        with self._lock:
+            self.subscribers[subscriber.key] = subscriber
+        self.logger.info(f"Client {subscriber.address} subscribed to world updates")
+        return {'status': 'success', 'type': 'subscribed', 'seq': self.seq}
+
+    def unsubscribe(self, connection):
+        self._remove(id(connection))
+
+    def _remove(self, key: int):
+        with self._lock:
+            subscriber = self.subscribers.pop(key, None)
+        if subscriber:
+            subscriber.close()
+            self.logger.info(f"Client {subscriber.address} unsubscribed from world updates")
+
+    def request_resync(self, connection) -> bool:
+        """Send the client a keyframe on the next tick"""
+        with self._lock:
+            subscriber = self.subscribers.get(id(connection))
+            if not subscriber:
+                return False
+            subscriber.needs_keyframe = True
+        return True
+
+    def is_subscribed(self, connection) -> bool:
+        return id(connection) in self.subscribers
+
+    def _encode_keyframe(self) -> bytes:
+        return (b'{"type": "keyframe", "seq": ' + str(self.seq).encode() +
+                b', "world_state": ' + self.game_map.serialize_json() + b'}')
+
+    def _build_delta(self):
+        """Collect pending changes into a delta, or None if nothing changed"""
+        with self._lock:
+            characters = self._changed_characters
+            plots = self._changed_plots
+            world_characters = self._changed_world_characters
+            self._changed_characters = set()
+            self._changed_plots = set()
+            self._changed_world_characters = set()
+
+        changes = self.game_map.serialize_delta(characters, plots, world_characters)
+        time_data = changes['world_state']['time']
+        time_changed = time_data != self._last_time
+        self._last_time = time_data
+
+        if not (characters or plots or world_characters or time_changed):
+            return None
+        return changes
+
+    def publish(self):
+        """Publish one tick of changes to every subscriber"""
+        # Reading the world happens where the world allows it; sending doesn't
+        for subscriber, data in self.run_in_world(self._collect):
+            if not subscriber.send(data):
+                self.logger.warning(f"Dropping subscriber {subscriber.address} after failed send")
+                self._remove(subscriber.key)
+
+    def _collect(self) -> list:
+        """Encode this tick's pushes as (subscriber, body) pairs"""
+        changes = self._build_delta()
+
+        with self._lock:
+            subscribers = list(self.subscribers.values())
+        if not subscribers:
+            return []
+
+        keyframe = None
+        if changes is not None:
+            self.seq += 1
+            self._deltas_since_keyframe += 1
+            if self._deltas_since_keyframe >= self.keyframe_interval:
+                # Periodic keyframe bounds how long a missed delta can linger
+                self._deltas_since_keyframe = 0
+                keyframe = self._encode_keyframe()
+                delta = keyframe
+            else:
+                delta = json.dumps({
+                    'type': 'delta',
+                    'seq': self.seq,
+                    'changes': changes
+                }).encode()
+
+        pushes = []
+        for subscriber in subscribers:
+            if subscriber.needs_keyframe:
+                if keyframe is None:
+                    keyframe = self._encode_keyframe()
+                pushes.append((subscriber, keyframe))
+                subscriber.needs_keyframe = False
+            elif changes is not None:
+                pushes.append((subscriber, delta))
+        return pushes
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except Exception as e:
+                self.logger.error(f"Error publishing world updates: {str(e)}")
@@ -0,0 +1,93 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class WorldOwnerThread:
+    """Owns the game map for the threaded world server.
+
+    Client handler threads, the subscription publisher and the main loop
+    submit commands to a queue instead of mutating the world themselves;
+    this thread applies them one batch at a time while holding the world
+    state lock. After each batch it publishes an encoded snapshot, so
+    readers get a consistent view without waiting for writers.
+    """
+
+    def __init__(self, game_map, max_batch: int = 256):
+        self.game_map = game_map
+        self.max_batch = max_batch
+        self.logger = logging.getLogger("WorldOwnerThread")
+        self.queue = queue.Queue()
+        self.running = False
+        self._thread = None
+        self._snapshot = None
+
+    @property
+    def snapshot(self) -> bytes:
+        """The encoded game map as of the last applied batch"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.call(self.game_map.serialize_json)
+        return snapshot
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="WorldOwnerThread")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Apply commands already queued, then stop"""
+        if not self.running:
+            return
+        self.running = False
+        self.queue.put(None)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=10.0)
+        self._thread = None
+
+    def submit(self, fn, *args) -> Future:
+        """Queue fn(*args) to run on the owner thread"""
+        future = Future()
+        self.queue.put((fn, args, future))
+        return future
+
+    def call(self, fn, *args, timeout: float = 10.0):
+        """Run fn(*args) on the owner thread and wait for the result"""
+        if not self.running or threading.current_thread() is self._thread:
+            return fn(*args)
+        return self.submit(fn, *args).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            # Apply whatever else is already waiting in the same batch
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self.game_map.world_state.lock:
+                for item in batch:
+                    if item is None:
+                        continue
+                    fn, args, future = item
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        future.set_result(fn(*args))
+                    except Exception as e:
+                        future.set_exception(e)
+
+                try:
+                    self._snapshot = self.game_map.serialize_json()
+                except Exception as e:
+                    self.logger.error(f"Error publishing world snapshot: {str(e)}")
+
+            if None in batch:
+                return
@@ -4,6 +4,13 @@ import json
 import logging
 from typing import Dict
 from src.utils.models import Position
+from src.server.subscriptions import SubscriptionManager
+from src.server.world_owner import WorldOwnerThread
+from src.utils.protocol import (
+    CODEC_JSON, MAX_FRAME_SIZE, PROTOCOL_VERSION, SUPPORTED_VERSIONS,
+    FrameDecoder, MessageError, ProtocolError, attach_request_id, available_codecs,
+    encode_body, encode_raw_frame
+)
 import time
 
 class WorldServer:
@@ -19,6 +26,13 @@ class WorldServer:
         self.characters = {}
         self.initialize_character_system()
         
+        # Delta/keyframe pushes for subscribed clients
+        self.subscriptions = SubscriptionManager(game_map)
+        
+        # Single thread that applies every world mutation
+        self.owner = WorldOwnerThread(game_map)
+        self.max_batch_size = 1000
+        
     def initialize_character_system(self):
         """Initialize the character tracking system"""
         try:
@@ -39,6 +53,7 @@ class WorldServer:
             for char_name, char_data in self.game_map.world_state.characters.items():
                 # Update game map characters
                 self.game_map.characters[char_name] = char_data
+                self.game_map.touch_character(char_name)
                 
                 # Update positions if available
                 if 'position' in char_data:
@@ -46,7 +61,7 @@ class WorldServer:
                         char_data['position']['x'],
                         char_data['position']['y']
                     )
-                    self.game_map.character_positions[char_name] = pos
+                    self.game_map.set_character_position(char_name, pos)
                 
                 # Update active characters
                 if char_data.get('online', False) and \
@@ -66,6 +81,9 @@ class WorldServer:
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen(5)
             self.running = True
+            self.owner.start()
+            self.subscriptions.run_in_world = self.run_in_world
+            self.subscriptions.start()
             
             self.logger.info(f"World server started on {self.host}:{self.port}")
             
@@ -86,41 +104,142 @@ class WorldServer:
             raise
                 
     def handle_client(self, client_socket, address):
+        # Subscription pushes share the socket with replies
+        send_lock = threading.Lock()
         try:
             self.logger.info(f"New client connected from {address}")
-            while self.running:
-                try:
-                    data = client_socket.recv(4096)
-                    if not data:
-                        break
-                        
-                    message = json.loads(data.decode())
-                    response = self.process_message(message)
-                    
-                    response_json = json.dumps(response)
-                    client_socket.send(response_json.encode())
-                    
-                except json.JSONDecodeError as e:
-                    self.logger.error(f"Invalid JSON received from {address}: {e}")
-                    error_response = json.dumps({
-                        "status": "error",
-                        "message": "Invalid JSON format"
-                    })
-                    client_socket.send(error_response.encode())
-                    
-                except Exception as e:
-                    self.logger.error(f"Error handling client message: {str(e)}")
-                    error_response = json.dumps({
-                        "status": "error",
-                        "message": str(e)
-                    })
-                    client_socket.send(error_response.encode())
+            data = client_socket.recv(65536)
+            if data:
+                # Old clients send bare JSON objects without framing
+                if data.startswith(b'{'):
+                    self._handle_legacy_client(client_socket, address, send_lock, data)
+                else:
+                    self._handle_framed_client(client_socket, address, send_lock, data)
                     
         except Exception as e:
             self.logger.error(f"Client handler error for {address}: {str(e)}")
         finally:
             self.logger.info(f"Client disconnected: {address}")
+            self.subscriptions.unsubscribe(client_socket)
             client_socket.close()
+
+    def _handle_framed_client(self, client_socket, address, send_lock, data):
+        """Serve a connection using length-prefixed frames"""
+        decoder = FrameDecoder()
+        while self.running and data:
+            while True:
+                try:
+                    # Pipelined requests are answered in order
+                    for codec, message in decoder.feed(data):
+                        response = self._dispatch(client_socket, send_lock, address, message, framed=True)
+                        self._send_frame(client_socket, send_lock, response, codec, message.get('id'))
+                    break
+                except MessageError as e:
+                    # Framing is intact: answer this frame and carry on with the rest
+                    self.logger.error(f"Invalid message from {address}: {e}")
+                    self._send_frame(client_socket, send_lock, {
+                        "status": "error",
+                        "message": str(e)
+                    }, e.codec, None)
+                    data = b''
+                except ProtocolError as e:
+                    # The stream can't be resynchronized after a bad frame
+                    self.logger.error(f"Protocol error from {address}: {e}")
+                    self._send_frame(client_socket, send_lock, {
+                        "status": "error",
+                        "message": str(e)
+                    }, CODEC_JSON, None)
+                    return
+            data = client_socket.recv(65536)
+
+    def _handle_legacy_client(self, client_socket, address, send_lock, data):
+        """Serve a connection sending one unframed JSON object per recv"""
+        while self.running and data:
+            try:
+                message = json.loads(data.decode())
+                response = self._dispatch(client_socket, send_lock, address, message, framed=False)
+                self._send_response(client_socket, send_lock, response)
+                
+            except json.JSONDecodeError as e:
+                self.logger.error(f"Invalid JSON received from {address}: {e}")
+                self._send_response(client_socket, send_lock, {
+                    "status": "error",
+                    "message": "Invalid JSON format"
+                })
+                
+            except Exception as e:
+                self.logger.error(f"Error handling client message: {str(e)}")
+                self._send_response(client_socket, send_lock, {
+                    "status": "error",
+                    "message": str(e)
+                })
+            data = client_socket.recv(4096)
+
+    def _dispatch(self, client_socket, send_lock, address, message, framed: bool):
+        """Route a message to the handler for its command"""
+        command = message.get('command')
+        if command == 'hello':
+            return self.process_hello(message)
+        if command in ('subscribe', 'resync', 'unsubscribe'):
+            return self.process_subscription(client_socket, send_lock, address, message, framed)
+        if command == 'get_world_state' and self.owner.running:
+            # Readers use the owner's latest snapshot instead of queueing
+            return b'{"status": "success", "world_state": ' + self.owner.snapshot + b'}'
+        return self.run_in_world(self.process_message, message)
+
+    def _encode_frame(self, response, codec: int, request_id) -> bytes:
+        """Encode a reply frame, echoing the request id"""
+        if isinstance(response, bytes):
+            # Pre-encoded responses are always JSON
+            return encode_raw_frame(attach_request_id(response, request_id), CODEC_JSON)
+        if request_id is not None:
+            response = dict(response, id=request_id)
+        return encode_raw_frame(encode_body(response, codec), codec)
+
+    def _send_frame(self, client_socket, send_lock, response, codec: int, request_id):
+        """Send a reply frame, echoing the request id"""
+        data = self._encode_frame(response, codec, request_id)
+        with send_lock:
+            client_socket.sendall(data)
+
+    def _send_response(self, client_socket, send_lock, response):
+        """Send an unframed reply; pre-encoded responses are sent as-is"""
+        data = response if isinstance(response, bytes) else json.dumps(response).encode()
+        # Subscribed connections read newline-delimited messages
+        if self.subscriptions.is_subscribed(client_socket):
+            data += b'\n'
+        with send_lock:
+            client_socket.sendall(data)
+
+    def process_hello(self, message):
+        """Negotiate protocol version and preferred codec"""
+        versions = [v for v in message.get('versions', [PROTOCOL_VERSION]) if v in SUPPORTED_VERSIONS]
+        if not versions:
+            return {
+                'status': 'error',
+                'message': f"No supported protocol version, server supports {SUPPORTED_VERSIONS}"
+            }
+        server_codecs = available_codecs()
+        codecs = [c for c in message.get('codecs', ['json']) if c in server_codecs]
+        return {
+            'status': 'success',
+            'version': max(versions),
+            'codec': codecs[0] if codecs else 'json',
+            'codecs': server_codecs,
+            'max_frame_size': MAX_FRAME_SIZE
+        }
+
+    def process_subscription(self, client_socket, send_lock, address, message, framed: bool = False):
+        """Handle subscribe, resync and unsubscribe commands"""
+        command = message.get('command')
+        if command == 'subscribe':
+            return self.subscriptions.subscribe(client_socket, send_lock, address, framed)
+        elif command == 'resync':
+            if self.subscriptions.request_resync(client_socket):
+                return {'status': 'success', 'type': 'resync', 'seq': self.subscriptions.seq}
+            return {'status': 'error', 'message': 'Not subscribed'}
+        self.subscriptions.unsubscribe(client_socket)
+        return {'status': 'success', 'type': 'unsubscribed'}
             
     def process_message(self, message):
         try:
@@ -131,56 +250,21 @@ class WorldServer:
                 if not hasattr(self.game_map.world_state, 'characters'):
                     self.initialize_character_system()
                     
-                world_state = self.game_map.serialize()
-                return {
-                    'status': 'success',
-                    'world_state': world_state
-                }
+                # Reuse the cached encoding shared by all clients
+                world_state = self.game_map.serialize_json()
+                return b'{"status": "success", "world_state": ' + world_state + b'}'
                 
             elif command == 'register_character':
-                character_data = message.get('character')
-                if character_data:
-                    name = character_data['name']
-                    # Update character data
-                    character_data['online'] = True
-                    character_data['last_update'] = time.time()
-                    character_data['status'] = 'active'
-                    
-                    # Add to world state characters
-                    self.game_map.world_state.characters[name] = character_data
-                    
-                    # Add to active characters set
-                    self.game_map.active_characters.add(name)
-                    
-                    # Register with game map
-                    if self.game_map.register_character(character_data):
-                        self.logger.info(f"Character {name} registered successfully")
-                        return {'status': 'success'}
-                        
-                return {
-                    'status': 'error',
-                    'message': 'Failed to register character'
-                }
+                return self._register_character(message.get('character'))
                 
             elif command == 'update_character':
-                character_data = message.get('character')
-                if character_data:
-                    name = character_data['name']
-                    character_data['last_update'] = time.time()
-                    
-                    # Update in world state
-                    self.game_map.world_state.characters[name] = character_data
-                    
-                    # Ensure character is in active set
-                    self.game_map.active_characters.add(name)
-                    
-                    if self.game_map.update_character(character_data):
-                        return {'status': 'success'}
-                        
-                return {
-                    'status': 'error',
-                    'message': 'Failed to update character'
-                }
+                return self._update_character(message.get('character'))
+                
+            elif command == 'unregister_character':
+                return self._unregister_character(message.get('character'))
+                
+            elif command == 'batch':
+                return self._process_batch(message.get('operations', []), message.get('flush', False))
                 
             return {
                 'status': 'error',
@@ -194,7 +278,109 @@ class WorldServer:
                 'message': str(e)
             }
             
+    def _register_character(self, character_data):
+        if character_data:
+            name = character_data['name']
+            # Update character data
+            character_data['online'] = True
+            character_data['last_update'] = time.time()
+            character_data['status'] = 'active'
+            
+            # Add to world state characters
+            self.game_map.world_state.characters[name] = character_data
+            
+            # Add to active characters set
+            self.game_map.active_characters.add(name)
+            
+            # Register with game map
+            if self.game_map.register_character(character_data):
+                self.logger.info(f"Character {name} registered successfully")
+                return {'status': 'success'}
+                
+        return {
+            'status': 'error',
+            'message': 'Failed to register character'
+        }
+
+    def _update_character(self, character_data):
+        if character_data:
+            name = character_data['name']
+            character_data['last_update'] = time.time()
+            
+            # Update in world state
+            self.game_map.world_state.characters[name] = character_data
+            
+            # Ensure character is in active set
+            self.game_map.active_characters.add(name)
+            
+            if self.game_map.update_character(character_data):
+                return {'status': 'success'}
+                
+        return {
+            'status': 'error',
+            'message': 'Failed to update character'
+        }
+
+    def _unregister_character(self, character_data):
+        """Take a character offline, e.g. when its host removes it"""
+        if character_data and self.game_map.unregister_character(character_data['name']):
+            self.logger.info(f"Character {character_data['name']} unregistered")
+            return {'status': 'success'}
+            
+        return {
+            'status': 'error',
+            'message': 'Failed to unregister character'
+        }
+
+    def _process_batch(self, operations, flush: bool = False):
+        """Apply many register/update/unregister operations in one pass"""
+        if len(operations) > self.max_batch_size:
+            return {
+                'status': 'error',
+                'message': f"Batch too large: {len(operations)} operations, limit is {self.max_batch_size}"
+            }
+        
+        handlers = {
+            'register_character': self._register_character,
+            'update_character': self._update_character,
+            'unregister_character': self._unregister_character
+        }
+        
+        # Hold the world lock so the batch is applied as one unit
+        results = []
+        with self.game_map.world_state.lock:
+            for operation in operations:
+                character = operation.get('character') or {}
+                handler = handlers.get(operation.get('command'))
+                if handler is None:
+                    results.append({
+                        'status': 'error',
+                        'name': character.get('name'),
+                        'message': 'Unsupported batch command'
+                    })
+                    continue
+                try:
+                    result = handler(character)
+                except Exception as e:
+                    result = {'status': 'error', 'message': str(e)}
+                results.append(dict(result, name=character.get('name')))
+        
+        # One save for the whole batch
+        if flush:
+            self.game_map.world_state.flush()
+        
+        return {
+            'status': 'success',
+            'results': results
+        }
+            
+    def run_in_world(self, fn, *args):
+        """Run fn on the thread that owns the world state"""
+        return self.owner.call(fn, *args)
+
     def stop(self):
         self.running = False
+        self.subscriptions.stop()
+        self.owner.stop()
         if hasattr(self, 'server_socket'):
             self.server_socket.close()
\ No newline at end of file
@@ -0,0 +1,161 @@
+# File: protocol.py
+"""
+Framing for the world server protocol.
+
+Every message is sent as a frame: an 8-byte header followed by the body.
+
+    magic   2 bytes  b'WS'
+    version 1 byte   protocol version
+    codec   1 byte   body encoding (JSON, msgpack or CBOR)
+    length  4 bytes  body length, big endian
+
+Requests may carry an 'id' which the server echoes in the response, so a
+client can pipeline several requests on one connection.
+"""
+import json
+import struct
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+PROTOCOL_VERSION = 1
+SUPPORTED_VERSIONS = [1]
+
+MAGIC = b'WS'
+HEADER = struct.Struct('!2sBBI')
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+CODEC_CBOR = 2
+
+CODEC_NAMES = {
+    CODEC_JSON: 'json',
+    CODEC_MSGPACK: 'msgpack',
+    CODEC_CBOR: 'cbor'
+}
+
+
+class ProtocolError(Exception):
+    """Raised when a peer sends a malformed frame"""
+
+
+class MessageError(ProtocolError):
+    """A frame arrived intact but its body isn't a valid message.
+
+    Unlike other protocol errors the stream is still in sync, so the
+    peer can be answered on the frame's codec and reading can go on.
+    """
+
+    def __init__(self, message: str, codec: int):
+        super().__init__(message)
+        self.codec = codec
+
+
+def available_codecs() -> List[str]:
+    """Codec names usable in this process, most compact first"""
+    codecs = []
+    if msgpack is not None:
+        codecs.append('msgpack')
+    if cbor2 is not None:
+        codecs.append('cbor')
+    codecs.append('json')
+    return codecs
+
+
+def codec_from_name(name: str) -> int:
+    for codec, codec_name in CODEC_NAMES.items():
+        if codec_name == name:
+            return codec
+    raise ProtocolError(f"Unknown codec: {name}")
+
+
+def encode_body(message: dict, codec: int = CODEC_JSON) -> bytes:
+    if codec == CODEC_JSON:
+        return json.dumps(message).encode()
+    if codec == CODEC_MSGPACK and msgpack is not None:
+        return msgpack.packb(message, use_bin_type=True)
+    if codec == CODEC_CBOR and cbor2 is not None:
+        return cbor2.dumps(message)
+    raise ProtocolError(f"Codec {CODEC_NAMES.get(codec, codec)} is not available")
+
+
+def decode_body(body: bytes, codec: int) -> dict:
+    if codec == CODEC_JSON:
+        return json.loads(body.decode())
+    if codec == CODEC_MSGPACK and msgpack is not None:
+        return msgpack.unpackb(body, raw=False)
+    if codec == CODEC_CBOR and cbor2 is not None:
+        return cbor2.loads(body)
+    raise ProtocolError(f"Codec {CODEC_NAMES.get(codec, codec)} is not available")
+
+
+def encode_raw_frame(body: bytes, codec: int = CODEC_JSON) -> bytes:
+    """Frame an already encoded body"""
+    if len(body) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame too large: {len(body)} bytes")
+    return HEADER.pack(MAGIC, PROTOCOL_VERSION, codec, len(body)) + body
+
+
+def encode_frame(message: dict, codec: int = CODEC_JSON) -> bytes:
+    return encode_raw_frame(encode_body(message, codec), codec)
+
+
+def attach_request_id(body: bytes, request_id) -> bytes:
+    """Add an 'id' field to a pre-encoded JSON object"""
+    if request_id is None:
+        return body
+    prefix = b'{"id": ' + json.dumps(request_id).encode()
+    return prefix + (b'}' if body == b'{}' else b', ' + body[1:])
+
+
+class FrameDecoder:
+    """Incrementally splits a byte stream into decoded frames"""
+
+    def __init__(self, max_frame_size: int = MAX_FRAME_SIZE):
+        self.buffer = bytearray()
+        self.max_frame_size = max_frame_size
+
+    def feed(self, data: bytes) -> Iterator[Tuple[int, dict]]:
+        """Add received bytes and yield (codec, message) per complete frame"""
+        self.buffer.extend(data)
+        while True:
+            frame = self._next_frame()
+            if frame is None:
+                return
+            codec, body = frame
+            try:
+                message = decode_body(body, codec)
+            except ProtocolError:
+                raise
+            except Exception as e:
+                # Bad UTF-8, JSON, msgpack or CBOR inside a well-formed frame
+                raise MessageError(f"Invalid message body: {e}", codec) from e
+            if not isinstance(message, dict):
+                raise MessageError("Message body must be an object", codec)
+            yield codec, message
+
+    def _next_frame(self) -> Optional[Tuple[int, bytes]]:
+        if len(self.buffer) < HEADER.size:
+            return None
+        magic, version, codec, length = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ProtocolError("Bad frame header")
+        if version not in SUPPORTED_VERSIONS:
+            raise ProtocolError(f"Unsupported protocol version: {version}")
+        if length > self.max_frame_size:
+            raise ProtocolError(f"Frame too large: {length} bytes")
+        end = HEADER.size + length
+        if len(self.buffer) < end:
+            return None
+        body = bytes(self.buffer[HEADER.size:end])
+        del self.buffer[:end]
+        return codec, body
@@ -0,0 +1,174 @@
+# File: spatial.py
+import heapq
+import math
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple
+from src.utils.position import Position
+
+
+class SpatialGrid:
+    """Uniform grid hash over keyed positions.
+
+    Every key sits in the cell containing its position, so point lookups
+    touch one cell and range and nearest-neighbour queries only visit the
+    cells that overlap the search area.
+    """
+
+    def __init__(self, cell_size: int = 8):
+        self.cell_size = cell_size
+        self.positions: Dict[Hashable, Position] = {}
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        # Occupied cell bounds (min_cx, min_cy, max_cx, max_cy), kept up to
+        # date on insert and recomputed lazily after an edge cell empties
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+        self._bounds_stale = False
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, key) -> bool:
+        return key in self.positions
+
+    def _cell(self, x: int, y: int) -> Tuple[int, int]:
+        return x // self.cell_size, y // self.cell_size
+
+    def insert(self, key, position: Position):
+        """Add a key, or move it if it is already indexed"""
+        old = self.positions.get(key)
+        if old is not None:
+            if old == position:
+                return
+            self._discard_from_cell(key, old)
+        self.positions[key] = position
+        cell = self._cell(position.x, position.y)
+        keys = self._cells.get(cell)
+        if keys is None:
+            keys = self._cells[cell] = set()
+            self._extend_bounds(cell)
+        keys.add(key)
+
+    def remove(self, key):
+        position = self.positions.pop(key, None)
+        if position is not None:
+            self._discard_from_cell(key, position)
+
+    def _discard_from_cell(self, key, position: Position):
+        cell = self._cell(position.x, position.y)
+        keys = self._cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+                bounds = self._bounds
+                if bounds is not None and (cell[0] in (bounds[0], bounds[2]) or cell[1] in (bounds[1], bounds[3])):
+                    self._bounds_stale = True
+
+    def _extend_bounds(self, cell: Tuple[int, int]):
+        if self._bounds_stale:
+            return  # Recomputed in full on the next query anyway
+        cx, cy = cell
+        if self._bounds is None:
+            self._bounds = (cx, cy, cx, cy)
+        else:
+            min_cx, min_cy, max_cx, max_cy = self._bounds
+            self._bounds = (min(min_cx, cx), min(min_cy, cy), max(max_cx, cx), max(max_cy, cy))
+
+    def _get_bounds(self) -> Optional[Tuple[int, int, int, int]]:
+        if self._bounds_stale:
+            self._bounds_stale = False
+            self._bounds = None
+            if self._cells:
+                xs = [cx for cx, _ in self._cells]
+                ys = [cy for _, cy in self._cells]
+                self._bounds = (min(xs), min(ys), max(xs), max(ys))
+        return self._bounds
+
+    def get(self, key) -> Optional[Position]:
+        return self.positions.get(key)
+
+    def at(self, position: Position) -> List[Hashable]:
+        """Keys located exactly at position"""
+        keys = self._cells.get(self._cell(position.x, position.y), ())
+        return [key for key in keys if self.positions[key] == position]
+
+    def in_rect(self, min_x: int, min_y: int, max_x: int, max_y: int) -> Iterator[Tuple[Hashable, Position]]:
+        """Yield (key, position) for keys inside the inclusive rectangle"""
+        min_cx, min_cy = self._cell(min_x, min_y)
+        max_cx, max_cy = self._cell(max_x, max_y)
+        # Sparse maps: scanning occupied cells beats walking an empty area
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(self._cells):
+            cells = [
+                keys for (cx, cy), keys in self._cells.items()
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy
+            ]
+        else:
+            cells = [
+                self._cells[(cx, cy)]
+                for cx in range(min_cx, max_cx + 1)
+                for cy in range(min_cy, max_cy + 1)
+                if (cx, cy) in self._cells
+            ]
+        for keys in cells:
+            for key in keys:
+                position = self.positions[key]
+                if min_x <= position.x <= max_x and min_y <= position.y <= max_y:
+                    yield key, position
+
+    def in_radius(self, center: Position, radius: float) -> List[Tuple[Hashable, float]]:
+        """(key, distance) pairs within radius of center, nearest first"""
+        reach = int(math.floor(radius))
+        found = []
+        for key, position in self.in_rect(center.x - reach, center.y - reach,
+                                          center.x + reach, center.y + reach):
+            distance = math.hypot(position.x - center.x, position.y - center.y)
+            if distance <= radius:
+                found.append((key, distance))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def nearest(self, center: Position, k: int = 1, exclude=None) -> List[Tuple[Hashable, float]]:
+        """The k keys closest to center as (key, distance), nearest first"""
+        if k <= 0 or not self.positions:
+            return []
+        cx, cy = self._cell(center.x, center.y)
+        best = []  # Max-heap of (-distance, tiebreak, key)
+        counter = 0
+        ring = 0
+        max_ring = self._max_ring(cx, cy)
+        # Once every key has been seen there is nothing further out
+        candidates = len(self.positions) - (1 if exclude is not None and exclude in self.positions else 0)
+        while ring <= max_ring and counter < candidates:
+            for cell in self._ring_cells(cx, cy, ring):
+                for key in self._cells.get(cell, ()):
+                    if exclude is not None and key == exclude:
+                        continue
+                    position = self.positions[key]
+                    distance = math.hypot(position.x - center.x, position.y - center.y)
+                    counter += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, counter, key))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, counter, key))
+            # Cells in the next ring are at least this far away
+            if len(best) == k and -best[0][0] <= ring * self.cell_size:
+                break
+            ring += 1
+        return [(key, -neg) for neg, _, key in sorted(best, key=lambda item: (-item[0], item[1]))]
+
+    def _max_ring(self, cx: int, cy: int) -> int:
+        """Rings needed from (cx, cy) to cover every occupied cell"""
+        bounds = self._get_bounds()
+        if bounds is None:
+            return -1
+        min_cx, min_cy, max_cx, max_cy = bounds
+        return max(cx - min_cx, max_cx - cx, cy - min_cy, max_cy - cy, 0)
+
+    def _ring_cells(self, cx: int, cy: int, ring: int) -> Iterator[Tuple[int, int]]:
+        if ring == 0:
+            yield cx, cy
+            return
+        for x in range(cx - ring, cx + ring + 1):
+            yield x, cy - ring
+            yield x, cy + ring
+        for y in range(cy - ring + 1, cy + ring):
+            yield cx - ring, y
+            yield cx + ring, y
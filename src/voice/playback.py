@@ -0,0 +1,36 @@
+import logging
+import shutil
+import subprocess
+from pathlib import Path
+
+try:
+    import sounddevice as sd
+    import soundfile
+except (ImportError, OSError):  # OSError when PortAudio is missing
+    sd = soundfile = None
+
+# Command line players tried in order when sounddevice can't decode the file
+_PLAYERS = (
+    ('ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet'),
+    ('mpg123', '-q'),
+    ('afplay',),
+)
+
+
+def play_file(audio_file: Path):
+    """Play an audio file on the default output device and wait for it to end"""
+    if sd is not None:
+        try:
+            samples, sample_rate = soundfile.read(str(audio_file), dtype='float32')
+            sd.play(samples, sample_rate)
+            sd.wait()
+            return
+        except Exception as e:
+            # Older libsndfile builds can't decode MP3
+            logging.debug(f"sounddevice playback failed, trying a player: {e}")
+
+    for player in _PLAYERS:
+        if shutil.which(player[0]):
+            subprocess.run([*player, str(audio_file)], check=False)
+            return
+    raise RuntimeError("No audio output available: install sounddevice and soundfile, or ffplay/mpg123")
@@ -1,52 +1,136 @@
 """
 This is the audio agent that completes audio tasks for the input
 """
-import os
-import openai
+import re
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, List, Optional
 from dotenv import load_dotenv
-import time
 import logging
+from src.voice.playback import play_file
+from src.voice.tts import TTSBackend, create_tts_backend
+from src.voice.tts_cache import TTSCache, get_tts_cache
 
 
 load_dotenv()
 
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+SPEECH_DIR = Path(__file__).parent / "speech_files"
+
+
+def split_sentences(text: str, max_chars: int = 250, min_chars: int = 20) -> List[str]:
+    """Split text into sentence-sized chunks for synthesis.
+
+    Fragments shorter than min_chars are joined to the next sentence, and
+    sentences longer than max_chars are split at commas or spaces.
+    """
+    chunks = []
+    pending = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = f"{pending} {sentence}".strip() if pending else sentence.strip()
+        pending = ""
+        if not sentence:
+            continue
+        if len(sentence) < min_chars:
+            pending = sentence
+            continue
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(', ', 0, max_chars)
+            cut = cut + 1 if cut > 0 else sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        chunks.append(sentence)
+    if pending:
+        if chunks and len(chunks[-1]) + len(pending) < max_chars:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
+
 class Speech:
-    def __init__(self):
-        self.api_key = os.getenv('OPENAI_API_KEY')
+    def __init__(self, voice: Optional[str] = None, model: str = "tts-1", cache_size_mb: int = 200,
+                 max_parallel: int = 3, backend="openai", cache_dir: Optional[str] = None,
+                 **backend_options):
         self.logger = logging.getLogger(__name__)
-        self.client = openai.OpenAI(api_key=self.api_key)
-        # Create a unique directory for speech files
-        self.speech_dir = Path(__file__).parent / "speech_files"
-        self.speech_dir.mkdir(exist_ok=True)
+        # backend is 'openai', 'espeak', 'pyttsx3', 'local', 'silent' or a TTSBackend
+        if isinstance(backend, str):
+            if backend == 'openai':
+                backend_options.setdefault('model', model)
+            backend = create_tts_backend(backend, **backend_options)
+        self.backend: TTSBackend = backend
+        self.voice = voice or self.backend.default_voice
+        # Speech files are cached by content, so repeated phrases are free;
+        # processes can share the directory
+        self.speech_dir = Path(cache_dir) if cache_dir else SPEECH_DIR
+        self.cache = get_tts_cache(self.speech_dir, max_bytes=cache_size_mb * 1024 * 1024)
+        # Sentences of one reply are synthesized side by side
+        self._pool = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="SpeechSynthesis")
 
-    def complete_task(self, input_text: str) -> Path:
+    def complete_task(self, input_text: str, voice: Optional[str] = None) -> Path:
         """Convert text to speech and save to file"""
+        voice = voice or self.voice
         try:
-            # Create unique filename using timestamp
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            speech_file = self.speech_dir / f"speech_{timestamp}.mp3"
-            
-            self.logger.info(f"Generating speech for text: {input_text[:50]}...")
-            
-            # Generate speech
-            response = self.client.audio.speech.create(
-                model="tts-1",
-                input=input_text,
-                voice="alloy",
-            )
-            
-            # Save the file
-            response.stream_to_file(str(speech_file))
-            
+            name = TTSCache.key(input_text, voice, self.backend.model_id, self.backend.audio_format)
+            with self.cache.lock_for(name):
+                cached = self.cache.get(name)
+                if cached:
+                    self.logger.debug(f"Speech cache hit for: {input_text[:50]}")
+                    return cached
+
+                self.logger.info(f"Generating speech for text: {input_text[:50]}...")
+
+                # Write to a private temp file, then move it into the cache in one step
+                temp_file = self.cache.temp_path()
+                try:
+                    self.backend.synthesize(input_text, voice, temp_file)
+                    if temp_file.stat().st_size == 0:
+                        raise Exception("Speech file was not created")
+                    speech_file = self.cache.put_file(name, temp_file)
+                finally:
+                    if temp_file.exists():
+                        temp_file.unlink()
+
             self.logger.info(f"Speech file saved to: {speech_file}")
-            
-            # Verify file exists and has content
-            if not speech_file.exists():
-                raise Exception("Speech file was not created")
-                
             return speech_file
-            
+
         except Exception as e:
             self.logger.error(f"Error in text-to-speech conversion: {e}")
             raise
+
+    def synthesize_chunks(self, text: str, voice: Optional[str] = None) -> Iterator[Path]:
+        """Synthesize text sentence by sentence; yields each file in order as soon as it is ready"""
+        futures = [self._pool.submit(self.complete_task, chunk, voice) for chunk in split_sentences(text)]
+        for future in futures:
+            yield future.result()
+
+    async def stream_chunks(self, text: str, voice: Optional[str] = None) -> AsyncIterator[Path]:
+        """Async version of synthesize_chunks for event loop callers"""
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(self._pool, self.complete_task, chunk, voice)
+            for chunk in split_sentences(text)
+        ]
+        try:
+            for future in futures:
+                yield await future
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def play_audio(self, audio_file: Path):
+        """Play a speech file on the speakers, returning when it has finished"""
+        play_file(audio_file)
+
+    def speak(self, text: str, play: Optional[Callable[[Path], None]] = None,
+              voice: Optional[str] = None) -> List[Path]:
+        """Play text as it is synthesized: the first sentence starts while the rest are generated"""
+        play = play or self.play_audio
+        played = []
+        for audio_file in self.synthesize_chunks(text, voice):
+            play(audio_file)
+            played.append(audio_file)
+        return played
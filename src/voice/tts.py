@@ -0,0 +1,166 @@
+from abc import ABC, abstractmethod
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from pathlib import Path
+from typing import Optional
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+try:
+    import pyttsx3
+except ImportError:
+    pyttsx3 = None
+
+
+class TTSBackend(ABC):
+    """Writes speech for a piece of text to an audio file"""
+
+    name = 'base'
+    audio_format = 'wav'
+    default_voice = 'default'
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the engine and model in cache keys"""
+        return self.name
+
+    @abstractmethod
+    def synthesize(self, text: str, voice: str, path: Path):
+        pass
+
+
+class OpenAITTSBackend(TTSBackend):
+    """OpenAI's hosted speech API"""
+
+    name = 'openai'
+    audio_format = 'mp3'
+    default_voice = 'alloy'
+
+    def __init__(self, model: str = 'tts-1', api_key: Optional[str] = None):
+        if openai is None:
+            raise ImportError("openai is not installed")
+        self.model = model
+        self.client = openai.OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
+
+    @property
+    def model_id(self) -> str:
+        # Keeps keys identical to files cached before backends existed
+        return self.model
+
+    def synthesize(self, text: str, voice: str, path: Path):
+        response = self.client.audio.speech.create(
+            model=self.model,
+            input=text,
+            voice=voice,
+        )
+        response.stream_to_file(str(path))
+
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng (or espeak) on the command line; fast and fully offline"""
+
+    name = 'espeak'
+    default_voice = 'en'
+
+    def __init__(self, words_per_minute: int = 170):
+        self.binary = shutil.which('espeak-ng') or shutil.which('espeak')
+        if self.binary is None:
+            raise ImportError("espeak-ng is not installed")
+        self.words_per_minute = words_per_minute
+
+    def synthesize(self, text: str, voice: str, path: Path):
+        subprocess.run(
+            [self.binary, '-v', voice, '-s', str(self.words_per_minute), '-w', str(path), text],
+            check=True,
+            capture_output=True
+        )
+
+
+class Pyttsx3Backend(TTSBackend):
+    """The system voices through pyttsx3 (SAPI5, NSSpeechSynthesizer or espeak)"""
+
+    name = 'pyttsx3'
+    default_voice = 'default'
+
+    def __init__(self, rate: int = 170):
+        if pyttsx3 is None:
+            raise ImportError("pyttsx3 is not installed")
+        self.engine = pyttsx3.init()
+        self.engine.setProperty('rate', rate)
+        self._voices = {voice.name.lower(): voice.id for voice in self.engine.getProperty('voices')}
+        self._default_voice_id = self.engine.getProperty('voice')
+        # The engine has a single run loop
+        self._lock = threading.Lock()
+
+    def synthesize(self, text: str, voice: str, path: Path):
+        with self._lock:
+            # The engine keeps the last voice set, so always set this call's one
+            if voice == self.default_voice:
+                voice_id = self._default_voice_id
+            else:
+                voice_id = self._voices.get(voice.lower(), voice)
+            self.engine.setProperty('voice', voice_id)
+            self.engine.save_to_file(text, str(path))
+            self.engine.runAndWait()
+
+
+class SilentBackend(TTSBackend):
+    """Writes silence as long as the text would take to say; for tests and benchmarks"""
+
+    name = 'silent'
+    default_voice = 'silent'
+
+    def __init__(self, sample_rate: int = 16000, seconds_per_char: float = 0.06):
+        self.sample_rate = sample_rate
+        self.seconds_per_char = seconds_per_char
+
+    def synthesize(self, text: str, voice: str, path: Path):
+        frames = int(len(text) * self.seconds_per_char * self.sample_rate)
+        with wave.open(str(path), 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(b'\0\0' * frames)
+
+
+_BACKENDS = {
+    'openai': OpenAITTSBackend,
+    'espeak': EspeakBackend,
+    'pyttsx3': Pyttsx3Backend,
+    'silent': SilentBackend,
+}
+
+
+# The one option 'local' takes, a speaking rate in words per minute,
+# under each engine's own name
+_LOCAL_RATE_OPTIONS = {
+    'pyttsx3': 'rate',
+    'espeak': 'words_per_minute',
+}
+
+
+def create_tts_backend(name: str = 'openai', **kwargs) -> TTSBackend:
+    """Build a backend by name: 'openai', 'espeak', 'pyttsx3', 'silent', or
+    'local' for the first offline engine that is installed"""
+    if name == 'local':
+        rate = kwargs.pop('rate', kwargs.pop('words_per_minute', None))
+        if kwargs:
+            raise ValueError(f"The local speech backend only takes rate, got {', '.join(kwargs)}")
+        for local in ('pyttsx3', 'espeak'):
+            options = {_LOCAL_RATE_OPTIONS[local]: rate} if rate is not None else {}
+            try:
+                return _BACKENDS[local](**options)
+            except (ImportError, RuntimeError, OSError):
+                continue
+        logging.warning("No local speech engine is installed, speech will be silent")
+        return SilentBackend()
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown speech backend: {name}")
+    return _BACKENDS[name](**kwargs)
@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Hold an exclusive lock on path across processes, where supported"""
+    with open(path, 'a') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class TTSCache:
+    """Content-addressed store for synthesized speech.
+
+    Files are named by a hash of everything that determines the audio
+    (text, voice, model, format), so identical requests share a file and
+    different ones can never overwrite each other. Files are written to
+    a temporary name and renamed into place, so readers never see a
+    partial file. Once the directory grows past max_bytes the least
+    recently used files are deleted.
+
+    Several processes may share a directory. Eviction takes a lock file,
+    re-reads the directory so every process's files count towards
+    max_bytes, and spares files used in the last min_age seconds, which
+    may still be playing or being served elsewhere.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 200 * 1024 * 1024, min_age: float = 300.0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.min_age = min_age
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # Name -> size, oldest first
+        self._total_bytes = 0
+        # Striped locks so two threads don't synthesize the same text at once
+        self._key_locks = [threading.Lock() for _ in range(32)]
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def key(text: str, voice: str, model: str, audio_format: str = 'mp3') -> str:
+        digest = hashlib.sha256()
+        for part in (model, voice, audio_format, text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return f"{digest.hexdigest()}.{audio_format}"
+
+    def lock_for(self, name: str) -> threading.Lock:
+        """Hold while checking for and creating one file"""
+        return self._key_locks[int(name[:8], 16) % len(self._key_locks)]
+
+    def _load(self):
+        for path in self.directory.iterdir():
+            if path.name.startswith('.tmp-'):
+                self._remove_stale(path)
+        self._set_entries(self._scan())
+
+    def _scan(self) -> List[Tuple[float, str, int]]:
+        """(mtime, name, size) of every cached file on disk, least recently used first"""
+        files = []
+        for path in self.directory.iterdir():
+            stem = path.name.split('.')[0]
+            if len(stem) == 64 and not path.name.startswith('.'):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue  # Evicted by another process meanwhile
+                files.append((stat.st_mtime, path.name, stat.st_size))
+        files.sort()
+        return files
+
+    def _set_entries(self, files: List[Tuple[float, str, int]]):
+        self._entries = OrderedDict((name, size) for _, name, size in files)
+        self._total_bytes = sum(self._entries.values())
+
+    def _remove_stale(self, path: Path):
+        # Left behind by a crash mid-write; young ones may still be in use
+        try:
+            if time.time() - path.stat().st_mtime > 3600:
+                path.unlink()
+        except OSError:
+            pass
+
+    def get(self, name: str) -> Optional[Path]:
+        """Path of a cached file, or None"""
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            path = self.directory / name
+            if not path.exists():
+                self._total_bytes -= self._entries.pop(name)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+        try:
+            # mtime records recency across restarts
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def temp_path(self) -> Path:
+        """A fresh file in the cache directory to synthesize into"""
+        fd, name = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        os.close(fd)
+        return Path(name)
+
+    def put_file(self, name: str, source: Path) -> Path:
+        """Move a finished file from temp_path() into the cache"""
+        path = self.directory / name
+        size = source.stat().st_size
+        os.replace(source, path)
+        with self._lock:
+            if name in self._entries:
+                self._total_bytes -= self._entries.pop(name)
+            self._entries[name] = size
+            self._total_bytes += size
+            self._evict(keep=name)
+        return path
+
+    def put(self, name: str, data: bytes) -> Path:
+        source = self.temp_path()
+        source.write_bytes(data)
+        return self.put_file(name, source)
+
+    def _evict(self, keep: str):
+        if self._total_bytes <= self.max_bytes:
+            return
+        # Other processes may be writing here too, so go by what is on disk
+        with _file_lock(self.directory / '.evict.lock'):
+            files = self._scan()
+            total = sum(size for _, _, size in files)
+            # Free a little extra so the next few puts don't rescan
+            target = self.max_bytes * 0.9
+            cutoff = time.time() - self.min_age
+            kept = []
+            for mtime, name, size in files:
+                if total <= target or mtime > cutoff or name == keep:
+                    kept.append((mtime, name, size))
+                    continue
+                try:
+                    (self.directory / name).unlink()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    self.logger.warning(f"Could not evict cached speech {name}: {e}")
+                    kept.append((mtime, name, size))
+                    continue
+                total -= size
+            self._set_entries(kept)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_tts_cache(directory: Path, max_bytes: int = 200 * 1024 * 1024) -> TTSCache:
+    """One cache per directory per process, so threads share the size accounting"""
+    directory = Path(directory).resolve()
+    with _caches_lock:
+        if directory not in _caches:
+            _caches[directory] = TTSCache(directory, max_bytes)
+        return _caches[directory]
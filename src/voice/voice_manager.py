@@ -1,10 +1,13 @@
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from src.voice.speech import Speech
 
 class VoiceManager:
-    def __init__(self):
-        self.speech_engine = Speech()
+    def __init__(self, speech_engine: Optional[Speech] = None, **speech_options):
+        # Hosts give each character its own manager around one shared
+        # engine, so output mode and virtual mic stay per character.
+        # Otherwise options such as backend='local' are passed to Speech
+        self.speech_engine = speech_engine or Speech(**speech_options)
         self.virtual_mic = None
         self.output_mode = "speakers"  # or "virtual_mic"
     
@@ -17,22 +20,21 @@ class VoiceManager:
         if mode in ["speakers", "virtual_mic"]:
             self.output_mode = mode
     
-    def speak(self, text: str) -> Optional[Path]:
-        """Generate speech and route it to the appropriate output"""
+    def speak(self, text: str, voice: Optional[str] = None) -> List[Path]:
+        """Generate speech and route it to the appropriate output.
+
+        Playback starts with the first sentence while later ones are
+        still being synthesized. Returns the files played, in order.
+        """
         try:
-            audio_file = self.speech_engine.complete_task(text)
-            
-            if not audio_file:
-                return None
-                
             if self.output_mode == "virtual_mic" and self.virtual_mic:
-                self.virtual_mic.play_audio(audio_file)
+                play = self.virtual_mic.play_audio
             else:
                 # Play through system speakers
-                self.speech_engine.play_audio(audio_file)
+                play = self.speech_engine.play_audio
                 
-            return audio_file
+            return self.speech_engine.speak(text, play, voice)
             
         except Exception as e:
             print(f"Error generating speech: {e}")
-            return None 
\ No newline at end of file
+            return [] 
\ No newline at end of file
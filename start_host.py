@@ -0,0 +1,37 @@
+import logging
+import signal
+import sys
+from src.game.character_host import CharacterHost, load_host_config
+from src.game.sharded_host import ShardedHost
+
+def main():
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger("CharacterHost")
+    
+    config_path = sys.argv[1] if len(sys.argv) > 1 else "host_config.json"
+    try:
+        config = load_host_config(config_path)
+    except Exception as e:
+        logger.error(f"Failed to load host config {config_path}: {str(e)}")
+        return
+    
+    # More than one shard spreads the characters over worker processes
+    if config.get('shards', 1) > 1:
+        host = ShardedHost(config)
+    else:
+        host = CharacterHost(config)
+    signal.signal(signal.SIGTERM, lambda *_: host.stop())
+    
+    try:
+        host.start()
+    except KeyboardInterrupt:
+        logger.info("Shutting down character host...")
+    except Exception as e:
+        logger.error(f"Error in character host: {str(e)}", exc_info=True)
+    finally:
+        if isinstance(host, CharacterHost):
+            host.game_map.world_state.close()
+
+if __name__ == "__main__":
+    main()